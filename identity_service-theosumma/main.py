@@ -48,7 +48,7 @@ from shared.config import add_origins_to_cors
 from shared.enums import MicroServiceName
 from shared.openapi_customization import inject_locale_header
 from shared.ts_ms.ms_manager import MsManager
-from shared.utils.global_store import set_request
+from shared.utils.global_store import reset_request, set_request
 from shared.utils.logger import TsLogger
 from shared.k8s_log_proxy import log_router
 
@@ -98,6 +98,7 @@ async def lifespan(application: FastAPI):
         start_cron_jobs()
         yield
     finally:
+        await MsManager.close()
         await close_engine()
 
 
@@ -185,8 +186,11 @@ app.add_middleware(EventHandlerASGIMiddleware, handlers=[local_handler])
 @app.middleware("http")
 async def set_global_data(request: Request, call_next):
     # Set request data in the global storage
-    set_request(request)
-    response = await call_next(request)
+    token = set_request(request)
+    try:
+        response = await call_next(request)
+    finally:
+        reset_request(token)
     response.headers["X-Robots-Tag"] = "noindex, nofollow"  # Add the X-Robots-Tag header to disallow indexing
     return response
 
@@ -85,6 +85,8 @@ class SharedSettings(BaseSettings):
     ES_USER: str = ''
     ES_PASSWORD: str = ''
     ES_PORT: int = 9200
+    # query embeddings kept per model per process; a 3072-dim entry is ~12 KB
+    EMBEDDING_CACHE_SIZE: int = 1_000
 
     TS_REDIS_HOST: str = ''
     TS_REDIS_PORT: str = ''
@@ -66,7 +66,7 @@ class ChunkEmbedder:
         :return: A list of floats representing the embedding.
         """
         try:
-            embedding = self.es_writer_handler.embed_model.embed_query(text)
+            embedding = self.es_writer_handler.embed_for_index(text)
             return embedding
         except Exception as e:
             raise
@@ -90,13 +90,14 @@ class ChunkEmbedder:
         #         self.failed_chunks.append(chunk)
         #         return
 
-        # Generate embedding
-        try:
-            embedding = await self.embed_text(chunk.text)
-            chunk.embedding = embedding
-        except Exception as e:
-            self.failed_chunks.append(chunk)
-            return
+        # Generate embedding unless embed_and_store_chunks already did
+        if chunk.embedding is None:
+            try:
+                embedding = await self.embed_text(chunk.text)
+                chunk.embedding = embedding
+            except Exception as e:
+                self.failed_chunks.append(chunk)
+                return
 
         # Prepare the document for Elasticsearch
         document = {
@@ -164,6 +165,15 @@ class ChunkEmbedder:
         self.tokens_count = sum(self.tokenizer.num_of_tokens(chunk.text) for chunk in chunks)
 
         logger.info("starting embedding and storing chunks...")
+        # one deduplicated embeddings call for the whole set; index_chunk only embeds
+        # the chunks this leaves without a vector
+        try:
+            embeddings = await self.es_writer_handler.embed_batch([chunk.text for chunk in chunks])
+            for chunk, embedding in zip(chunks, embeddings):
+                chunk.embedding = embedding
+        except Exception as e:
+            logger.error(f"Batch embedding failed, embedding chunks one by one: {str(e)}")
+
         tasks = [self.index_chunk(chunk) for chunk in chunks]
         await asyncio.gather(*tasks)
 
@@ -1,6 +1,8 @@
 from typing import Optional, Tuple
+from uuid import uuid4
 
 from sqlalchemy.ext.asyncio import create_async_engine, AsyncSession, AsyncEngine, async_sessionmaker
+from sqlalchemy.pool import NullPool
 
 engine: Optional[AsyncEngine] = None
 AsyncSessionLocal: Optional[async_sessionmaker[AsyncSession]] = None
@@ -11,16 +13,34 @@ def create_engine_from_settings(settings) -> tuple[AsyncEngine, async_sessionmak
 
     url = settings.DATABASE_URL.replace("postgresql://", "postgresql+asyncpg://")
 
-    engine = create_async_engine(
-        url,
-        pool_size=int(getattr(settings, "POOL_SIZE", 10)),
-        max_overflow=int(getattr(settings, "MAX_OVERFLOW", 20)),
-        pool_timeout=int(getattr(settings, "POOL_TIMEOUT", 30)),
-        pool_recycle=int(getattr(settings, "POOL_RECYCLE", 300)),
-        pool_pre_ping=True,
-        pool_use_lifo=True,          # new
-        echo_pool=getattr(settings, "DEBUG_SQL", False),
-    )
+    if str(getattr(settings, "PGBOUNCER_TRANSACTION_MODE", "")).lower() in ("1", "true", "yes"):
+        # PgBouncer owns the pooling; prepared statements break when consecutive
+        # transactions land on different server connections. Disable both asyncpg's
+        # cache and SQLAlchemy's dialect-level one, and give every statement a unique
+        # name so a name is never reused on a backend that did not prepare it.
+        engine = create_async_engine(
+            url,
+            poolclass=NullPool,
+            connect_args={
+                "statement_cache_size": 0,
+                "prepared_statement_cache_size": 0,
+                "prepared_statement_name_func": lambda: f"__asyncpg_{uuid4()}__",
+            },
+            echo_pool=getattr(settings, "DEBUG_SQL", False),
+            query_cache_size=int(getattr(settings, "QUERY_CACHE_SIZE", 2000)),
+        )
+    else:
+        engine = create_async_engine(
+            url,
+            pool_size=int(getattr(settings, "POOL_SIZE", 20)),
+            max_overflow=int(getattr(settings, "MAX_OVERFLOW", 10)),
+            pool_timeout=int(getattr(settings, "POOL_TIMEOUT", 30)),
+            pool_recycle=int(getattr(settings, "POOL_RECYCLE", 1800)),
+            pool_pre_ping=True,
+            pool_use_lifo=True,          # new
+            echo_pool=getattr(settings, "DEBUG_SQL", False),
+            query_cache_size=int(getattr(settings, "QUERY_CACHE_SIZE", 2000)),
+        )
 
     AsyncSessionLocal = async_sessionmaker(
         bind=engine,
@@ -58,23 +58,29 @@ from uuid import UUID
 from mistralai import Mistral
 import regex as re
 from langchain_text_splitters import RecursiveCharacterTextSplitter
-from pypdf import PdfReader, PdfWriter
+from semantic_text_splitter import TextSplitter
+import pypdfium2 as pdfium
+import tiktoken
 from sqlalchemy import select
 from rich.console import Console
 from rich.pretty import Pretty
 from rich.table import Table
-import markdown
-from bs4 import BeautifulSoup
 
 from community_service.DB import AsyncSessionLocal
 from core_service.DB import Document, AgentDocument, Agent
 from core_service.config import settings
 from core_service.rag.es_client import ESClient
+from shared.rag.es_client import bulk_ingest_mode
 from shared.data_processing.text_processing.text_extractor import TextExtractor
 from shared.enums import AgentDocumentProcessingStatus
+from shared.rag.embedding_cache import embed_deduplicated
+from shared.rag.vectors import l2_normalize
 
 console = Console()
 PROCESS_ONLY_FOUND_FILES = True
+# Chunk boundaries (and so chunk hashes) differ between splitters; set False to
+# keep re-indexed documents on the LangChain splitter.
+USE_SEMANTIC_TEXT_SPLITTER = True
 
 """
 Fully‑working RAG document indexer.
@@ -87,8 +93,15 @@ Fully‑working RAG document indexer.
 """
 
 import asyncio
+import functools
 import hashlib
+import html
+import io
 import sys
+from collections import defaultdict
+from contextlib import nullcontext
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, field
 from pathlib import Path
 from typing import List
 
@@ -112,9 +125,25 @@ RAW_DIR = Path("raw_documents")
 ALPHA_RE = r'\p{L}'  # any Unicode letter
 ALPHA3_RE = r'\p{L}{3,}'  # ≥3 consecutive letters
 
+# Compiled once at import; these run per chunk over every document.
+_WS = re.compile(r"\s+")
+_AR_CLEAN = re.compile(r"[^؀-ۿ\w\s\.,;:!\?\-]")
+_LATIN_CLEAN = re.compile(r"[^\w\s\.,;:!\?\-]")
+_ALPHA = re.compile(ALPHA_RE)
+_ALPHA3 = re.compile(ALPHA3_RE)
+_GIBBERISH = re.compile(r"[^\w\s\.,;:!?-]")
+
+# cl100k_base: the encoding the chunk splitters size chunks with
+_TOKEN_ENCODING = tiktoken.get_encoding("cl100k_base")
+
+# Worker processes for CPU-bound PDF work (pdfminer parsing, page slicing)
+_PDF_POOL = ProcessPoolExecutor(max_workers=os.cpu_count())
+
 
 def get_raw_doc_names() -> set:
-    return {p.name for p in RAW_DIR.iterdir() if p.is_file()}
+    # scandir's DirEntry.is_file() uses the cached dirent type, no stat per file
+    with os.scandir(RAW_DIR) as entries:
+        return {e.name for e in entries if e.is_file()}
 
 
 def prevalidate(raw_doc_names: set, used_doc_names: set) -> None:
@@ -154,8 +183,9 @@ async def extract_text(path: Path) -> str:
         if ext == ".txt":
             return (await asyncio.to_thread(path.read_text)).strip()
         elif ext == ".pdf":
-            # synchronous but offloaded to thread so we don't block the event loop
-            return await asyncio.to_thread(pdf_extract, str(path))
+            # pdfminer is pure-Python and CPU-bound; parse in a worker process
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(_PDF_POOL, pdf_extract, str(path))
         elif ext in (".docx", ".doc"):
             def _load_docx():
                 doc = DocxDocument(str(path))
@@ -178,75 +208,144 @@ async def ocr_text(path: Path, lang_hint: str = "eng+ara") -> str:
     return extractor.extract_text_from_uploaded_file()
 
 
-async def mistral_ocr_text(path: Path) -> str:
+# Markdown constructs Mistral OCR emits, stripped in one regex pass each
+_MD_IMAGE = re.compile(r"!\[[^\]]*\]\([^)]*\)")
+_MD_LINK = re.compile(r"\[([^\]]*)\]\([^)]*\)")
+_MD_HEADING = re.compile(r"^[ ]{0,3}#{1,6}[ \t]*", re.MULTILINE)
+_MD_BLOCKQUOTE = re.compile(r"^[ ]{0,3}>[ ]?", re.MULTILINE)
+_MD_LIST_BULLET = re.compile(r"^[ \t]*[-*+][ \t]+", re.MULTILINE)
+_MD_RULE = re.compile(r"^[ ]{0,3}([-*_])(?:[ \t]*\1){2,}[ \t]*$", re.MULTILINE)
+_MD_EMPHASIS = re.compile(r"(\*{1,3}|~~)(?=\S)(.+?)(?<=\S)\1")
+# underscores only count as emphasis at word boundaries (keeps snake_case intact)
+_MD_UNDERSCORE_EMPHASIS = re.compile(r"(?<!\w)(_{1,3})(?=\S)(.+?)(?<=\S)\1(?!\w)")
+_MD_INLINE_CODE = re.compile(r"`([^`]*)`")
+
+
+def markdown_to_text(markdown_text: str) -> str:
     """
-    Fallback: upload PDF to Mistral and get OCR result via signed URL.
-    Extracts structured text from markdown of each page.
+    Strip markdown syntax down to plain text (images dropped, links → their text),
+    without rendering to HTML and re-parsing it.
     """
+    text = _MD_IMAGE.sub("", markdown_text)
+    text = _MD_LINK.sub(r"\1", text)
+    text = _MD_RULE.sub("", text)
+    text = _MD_HEADING.sub("", text)
+    text = _MD_BLOCKQUOTE.sub("", text)
+    text = _MD_LIST_BULLET.sub("", text)
+    text = _MD_EMPHASIS.sub(r"\2", text)
+    text = _MD_UNDERSCORE_EMPHASIS.sub(r"\2", text)
+    text = _MD_INLINE_CODE.sub(r"\1", text)
+    return html.unescape(text).strip()
+
+
+MISTRAL_MAX_CONCURRENT_REQUESTS = 4
+_MISTRAL_SEMAPHORE = asyncio.Semaphore(MISTRAL_MAX_CONCURRENT_REQUESTS)
+
+
+def _sync_mistral_ocr(pdf_bytes: bytes, file_name: str) -> str:
+    api_key = settings.MISTRAL_API_KEY
+    if not api_key:
+        raise RuntimeError("MISTRAL_API_KEY is not set")
+
+    client = Mistral(api_key=api_key)
+
+    uploaded_pdf = client.files.upload(
+        file={
+            "file_name": file_name,
+            "content": pdf_bytes,
+        },
+        purpose="ocr",
+    )
 
-    def _sync_mistral(pdf_path: Path) -> str:
-        api_key = settings.MISTRAL_API_KEY
-        if not api_key:
-            raise RuntimeError("MISTRAL_API_KEY is not set")
+    signed_url = client.files.get_signed_url(file_id=uploaded_pdf.id)
 
-        client = Mistral(api_key=api_key)
+    ocr_response = client.ocr.process(
+        model="mistral-ocr-latest",
+        document={
+            "type": "document_url",
+            "document_url": signed_url.url,
+        },
+    )
 
-        pdf_bytes = pdf_path.read_bytes()
-        uploaded_pdf = client.files.upload(
-            file={
-                "file_name": pdf_path.name,
-                "content": pdf_bytes,
-            },
-            purpose="ocr",
-        )
+    pages_sorted = sorted(ocr_response.pages, key=lambda p: p.index)
+    markdown_text = "\n\n".join(p.markdown for p in pages_sorted)
 
-        signed_url = client.files.get_signed_url(file_id=uploaded_pdf.id)
+    return markdown_to_text(markdown_text)
 
-        ocr_response = client.ocr.process(
-            model="mistral-ocr-latest",
-            document={
-                "type": "document_url",
-                "document_url": signed_url.url,
-            },
-        )
 
-        pages_sorted = sorted(ocr_response.pages, key=lambda p: p.index)
-        markdown_text = "\n\n".join(p.markdown for p in pages_sorted)
+async def mistral_ocr_bytes(pdf_bytes: bytes, file_name: str) -> str:
+    """
+    Upload in-memory PDF bytes to Mistral and return the OCR'd plain text.
+    Calls from every extract worker share one semaphore, so at most
+    MISTRAL_MAX_CONCURRENT_REQUESTS requests are in flight per process.
+    """
+    async with _MISTRAL_SEMAPHORE:
+        return await asyncio.to_thread(_sync_mistral_ocr, pdf_bytes, file_name)
 
-        html = markdown.markdown(markdown_text)
-        soup = BeautifulSoup(html, "html.parser")
-        plain_text = soup.get_text(separator="\n")
 
-        return plain_text.strip()
+async def mistral_ocr_text(path: Path) -> str:
+    """
+    Fallback: upload PDF to Mistral and get OCR result via signed URL.
+    Extracts structured text from markdown of each page.
+    """
+    pdf_bytes = await asyncio.to_thread(path.read_bytes)
+    return await mistral_ocr_bytes(pdf_bytes, path.name)
 
-    return await asyncio.to_thread(_sync_mistral, path)
 
 
-async def mistral_ocr_paginated(path: Path, max_pages: int = 1000) -> str:
-    reader = await asyncio.to_thread(PdfReader, str(path))
-    total = len(reader.pages)
-    parts = []
-    for start in range(0, total, max_pages):
-        end = min(start + max_pages, total)
 
-        # build the chunk writer off-thread
+def _count_pdf_pages(pdf_bytes: bytes) -> int:
+    pdf = pdfium.PdfDocument(pdf_bytes)
+    try:
+        return len(pdf)
+    finally:
+        pdf.close()
 
-        def _write_chunk(reader, start, end, temp_path):
-            writer = PdfWriter()
 
-            for p in range(start, end):
-                writer.add_page(reader.pages[p])
+def _write_chunk_pickleable(pdf_bytes: bytes, start: int, end: int) -> bytes:
+    """
+    Build a PDF holding pages [start, end) of `pdf_bytes`.
+    Runs in a worker process, so the document is re-opened from raw bytes
+    instead of passing an (unpicklable) pdfium handle across the boundary.
+    Pages are imported by pdfium natively rather than copied object-by-object.
+    """
+    src = pdfium.PdfDocument(pdf_bytes)
+    dst = pdfium.PdfDocument.new()
+    try:
+        dst.import_pages(src, list(range(start, end)))
+        buffer = io.BytesIO()
+        dst.save(buffer)
+        return buffer.getvalue()
+    finally:
+        dst.close()
+        src.close()
 
-            with open(temp_path, "wb") as f:
-                writer.write(f)
 
-        temp = path.with_name(f"{path.stem}_{start + 1}_{end}{path.suffix}")
-        await asyncio.to_thread(_write_chunk, reader, start, end, str(temp))
-        try:
-            part_text = await mistral_ocr_text(temp)
-        finally:
-            temp.unlink()
-        parts.append(part_text)
+async def mistral_ocr_paginated(path: Path, max_pages: int = 1000) -> str:
+    """
+    OCR a PDF in page ranges of at most `max_pages`.
+    Ranges are sliced in a process pool and sent to Mistral concurrently
+    (bounded by the shared MISTRAL_MAX_CONCURRENT_REQUESTS semaphore); parts are joined in page order.
+    """
+    pdf_bytes = await asyncio.to_thread(path.read_bytes)
+    loop = asyncio.get_running_loop()
+    # pdfium is not thread-safe; every pdfium call goes through the process pool
+    total = await loop.run_in_executor(_PDF_POOL, _count_pdf_pages, pdf_bytes)
+    ranges = [(start, min(start + max_pages, total)) for start in range(0, total, max_pages)]
+
+    if len(ranges) <= 1:
+        return await mistral_ocr_bytes(pdf_bytes, path.name)
+
+    chunks = await asyncio.gather(*[
+        loop.run_in_executor(_PDF_POOL, _write_chunk_pickleable, pdf_bytes, start, end)
+        for start, end in ranges
+    ])
+
+    # gather preserves input order, so parts stay in page order
+    parts = await asyncio.gather(*[
+        mistral_ocr_bytes(chunk_bytes, f"{path.stem}_{start + 1}_{end}{path.suffix}")
+        for chunk_bytes, (start, end) in zip(chunks, ranges)
+    ])
     return "\n\n".join(parts)
 
 
@@ -255,11 +354,11 @@ def clean_text(text: str, language: str) -> str:
     Naïve cleaning – strip control chars, multiple‑spaces, etc.
     You can plug in language‑specific pipelines here.
     """
-    text = re.sub(r"\s+", " ", text)
+    text = _WS.sub(" ", text)
     if language != "en":
         # remove latin artifacts & keep language‑specific chars + basic punctuation
-        pattern = r"[^؀-ۿ\w\s\.,;:!\?\-]" if language == "ar" else r"[^\w\s\.,;:!\?\-]"
-        text = re.sub(pattern, " ", text)
+        pattern = _AR_CLEAN if language == "ar" else _LATIN_CLEAN
+        text = pattern.sub(" ", text)
     return text.strip()
 
 
@@ -268,17 +367,31 @@ def is_meaningful_chunk(chunk: str) -> bool:
     if len(tokens) < 20:  # was 10 – beef it up a little
         return False
 
-    # Strip everything that is not a letter for the ratio test
-    alpha_chars = re.findall(ALPHA_RE, chunk)
-    alpha_ratio = len(alpha_chars) / max(len(chunk), 1)
-
-    # How many tokens contain a “real” word‑like substring?
-    word_like = [t for t in tokens if re.search(ALPHA3_RE, t)]
-    word_like_ratio = len(word_like) / len(tokens)
-
-    # How many tokens are only a single letter?
-    single_letter = [t for t in tokens if re.fullmatch(ALPHA_RE, t)]
-    single_ratio = len(single_letter) / len(tokens)
+    # Single pass over every token: count letters, tokens holding a 3+ letter
+    # run ("real" word-like), and tokens that are just one letter.
+    # str.isalpha() matches the same Unicode letter classes as \p{L}.
+    total_alpha = 0
+    word_like_count = 0
+    single_letter_count = 0
+    for token in tokens:
+        run_len = 0
+        has3run = False
+        for c in token:
+            if c.isalpha():
+                total_alpha += 1
+                run_len += 1
+                if run_len >= 3:
+                    has3run = True
+            else:
+                run_len = 0
+        if has3run:
+            word_like_count += 1
+        elif len(token) == 1 and run_len == 1:
+            single_letter_count += 1
+
+    alpha_ratio = total_alpha / max(len(chunk), 1)
+    word_like_ratio = word_like_count / len(tokens)
+    single_ratio = single_letter_count / len(tokens)
 
     return (
             alpha_ratio > 0.65  # raise the bar
@@ -295,36 +408,65 @@ def looks_like_real_text(text: str) -> bool:
     if len(words) < 50:
         return False
 
-    alpha_chars = re.findall(ALPHA_RE, text)
-    alpha_ratio = len(alpha_chars) / max(len(text), 1)
+    text_len = len(text)
+    alpha_limit = 0.65 * text_len
+    gibberish_limit = 0.10 * text_len
+
+    # Scan the text in quarters and bail out as soon as a threshold can no
+    # longer be met: odd symbols only accumulate, and the letter count can
+    # at best grow by the length of the text not yet scanned.
+    alpha_count = 0
+    gibberish_count = 0
+    block = -(-text_len // 4)
+    for start in range(0, text_len, block):
+        part = text[start:start + block]
+        alpha_count += len(_ALPHA.findall(part))
+        gibberish_count += len(_GIBBERISH.findall(part))
+        if gibberish_count >= gibberish_limit:
+            return False
+        if alpha_count + (text_len - start - len(part)) <= alpha_limit:
+            return False
+
+    # Word-like tokens: must have 3+ consecutive letters; stop once more
+    # than half of the words qualify
+    half = len(words) / 2
+    word_like_count = 0
+    for w in words:
+        if _ALPHA3.search(w):
+            word_like_count += 1
+            if word_like_count > half:
+                return True
+    return False
+
+
+@functools.lru_cache(maxsize=8)
+def _get_splitter(chunk_size_tokens: int, overlap: int) -> RecursiveCharacterTextSplitter:
+    # building the splitter loads a tiktoken encoder; do it once per configuration
+    return RecursiveCharacterTextSplitter.from_tiktoken_encoder(
+        chunk_size=chunk_size_tokens,
+        chunk_overlap=overlap,
+    )
 
-    # Word-like tokens: must have 3+ consecutive letters
-    word_like = [w for w in words if re.search(ALPHA3_RE, w)]
-    word_like_ratio = len(word_like) / len(words)
 
-    # Penalize texts with too many special characters or symbols
-    gibberish_penalty = len(re.findall(r"[^\w\s\.,;:!?-]", text)) / len(text)
-
-    # Fail if there are too few good words or too many odd symbols
-    # print("Alpha Ratio:", alpha_ratio)
-    # print("Word-like Ratio:", word_like_ratio)
-    # print("Gibberish Penalty:", gibberish_penalty)
-    return (
-            alpha_ratio > 0.65
-            and word_like_ratio > 0.50
-            and gibberish_penalty < 0.10
-    )
+@functools.lru_cache(maxsize=8)
+def _get_semantic_splitter(chunk_size_tokens: int, overlap: int) -> TextSplitter:
+    # "gpt-4" → cl100k_base, the same encoding the LangChain splitter counts with
+    return TextSplitter.from_tiktoken_model("gpt-4", chunk_size_tokens, overlap=overlap)
 
 
 def semantic_chunk(text: str, chunk_size_tokens: int = 380, overlap: int = 40) -> List[str]:
     """
-    Simple RecursiveCharacter splitter.  For more advanced semantic splitting,
-    plug in semantic-text-splitter once it's installed.
+    Split text into token-bounded chunks with the Rust-backed semantic-text-splitter.
+    Falls back to LangChain's RecursiveCharacter splitter when USE_SEMANTIC_TEXT_SPLITTER
+    is off or the Rust splitter rejects the input.
     """
-    splitter = RecursiveCharacterTextSplitter.from_tiktoken_encoder(
-        chunk_size=chunk_size_tokens,
-        chunk_overlap=overlap,
-    )
+    if USE_SEMANTIC_TEXT_SPLITTER:
+        try:
+            return _get_semantic_splitter(chunk_size_tokens, overlap).chunks(text)
+        except Exception as exc:
+            logger.warning("semantic-text-splitter failed, falling back to RecursiveCharacter splitter: %s", exc)
+
+    splitter = _get_splitter(chunk_size_tokens, overlap)
     return splitter.split_text(text)
 
 
@@ -332,6 +474,20 @@ def sha256_hex(data: str) -> str:
     return hashlib.sha256(data.encode("utf-8")).hexdigest()
 
 
+def chunk_hashes(document_id, chunks: List[str]) -> List[str]:
+    """
+    sha256 of f"{document_id}:{idx}:{chunk}" for every chunk.
+    The document-id prefix is hashed once and the digest state copied per chunk.
+    """
+    prefix = hashlib.sha256(f"{document_id}:".encode("utf-8"))
+    hashes = []
+    for idx, chunk in enumerate(chunks):
+        h = prefix.copy()
+        h.update(f"{idx}:{chunk}".encode("utf-8"))
+        hashes.append(h.hexdigest())
+    return hashes
+
+
 #############################################
 # ------------ MAIN LOGIC ------------------#
 #############################################
@@ -341,19 +497,31 @@ agent_manager = AgentManager()
 es_client = ESClient()
 
 
-async def process_document(
-        session,
-        agent_id,
-        doc: Document,
-) -> None:
+@dataclass
+class DocumentJob:
     """
-    End‑to‑end pipeline for one document.
-    Processes sequentially; embeds + ES writes within the doc are batched async.
+    One document moving through the indexing stages.
+    `status` is set to a *_FAILED value by the stage that gave up on it.
+    `document_id` / `name_with_ext` are copied off the ORM row on the event loop, so
+    stages running in worker threads never touch the shared session's objects.
     """
-    logger.info("▶︎ Processing document «%s» (%s)", doc.document_title, doc.document_id)
-    doc.document_status = AgentDocumentProcessingStatus.EXTRACTING_TEXT
-    await session.commit()
-
+    agent_id: UUID
+    doc: Document
+    document_id: UUID = field(init=False)
+    name_with_ext: str = field(init=False)
+    text: str = ""
+    language: str = "unknown"
+    docs_to_index: List[dict] = field(default_factory=list)
+    status: AgentDocumentProcessingStatus | None = None
+
+    def __post_init__(self):
+        self.document_id = self.doc.document_id
+        self.name_with_ext = self.doc.name_with_ext
+
+
+async def extract_stage(job: DocumentJob) -> None:
+    """Extract text (falling back to OCR) and detect its language."""
+    doc = job.doc
     file_path = RAW_DIR / doc.name_with_ext
     text = await extract_text(file_path)
 
@@ -368,121 +536,208 @@ async def process_document(
 
     if len(text.strip()) < 100 or not any(c.isalpha() for c in text):  # too short or no real text
         logger.warning("Still too short after OCR – skipping %s", doc.name_with_ext)
-        doc.document_status = AgentDocumentProcessingStatus.EXTRACTING_TEXT_FAILED
-        await session.commit()
+        job.status = AgentDocumentProcessingStatus.EXTRACTING_TEXT_FAILED
         return
 
     # language detection
     try:
-        language = detect(text)
+        language = await asyncio.to_thread(detect, text)
     except LangDetectException:
         language = "unknown"
 
-    # chunking
-    doc.document_status = AgentDocumentProcessingStatus.CHUNKING_TEXT_SEMANTICALLY
-    await session.commit()
+    job.text = text
+    job.language = language
+
 
-    raw_chunks = semantic_chunk(text)
+def chunk_stage(job: DocumentJob) -> None:
+    """
+    Semantic-chunk the text and build the ES metadata for every kept chunk.
+    Runs in a worker thread, so it reads only plain fields of the job, never `job.doc`.
+    """
+    raw_chunks = semantic_chunk(job.text)
     chunks = [c for c in raw_chunks if is_meaningful_chunk(c)]
+    job.text = ""  # no longer needed; free it before the job waits for embedding
 
     if not chunks:
-        doc.document_status = AgentDocumentProcessingStatus.CHUNKING_TEXT_SEMANTICALLY_FAILED
-        await session.commit()
-        logger.warning("All chunks discarded as meaningless for document: %s", doc.name_with_ext)
+        logger.warning("All chunks discarded as meaningless for document: %s", job.name_with_ext)
+        job.status = AgentDocumentProcessingStatus.CHUNKING_TEXT_SEMANTICALLY_FAILED
         return
 
     # build meta objects
-    docs_to_index = []
-    embeddings_input = []
+    hashes = chunk_hashes(job.document_id, chunks)
+    token_counts = [len(tokens) for tokens in _TOKEN_ENCODING.encode_batch(chunks, disallowed_special=())]
     for idx, chunk in enumerate(chunks):
-        chunk_hash = sha256_hex(f"{doc.document_id}:{idx}:{chunk}")
-        prev_hash = sha256_hex(f"{doc.document_id}:{idx - 1}") if idx > 0 else ""
-        next_hash = sha256_hex(f"{doc.document_id}:{idx + 1}") if idx < len(chunks) - 1 else ""
-        embeddings_input.append(chunk)
+        chunk_hash = hashes[idx]
+        prev_hash = hashes[idx - 1] if idx > 0 else ""
+        next_hash = hashes[idx + 1] if idx < len(chunks) - 1 else ""
         meta = {
             "chunk_text": chunk,
             "chunk_hash": chunk_hash,
             "prev_chunk_hash": prev_hash,
             "next_chunk_hash": next_hash,
             "chunk_sequence": idx,
-            "document_id": str(doc.document_id),
-            "agent_ids": [str(agent_id)],
-            "token_count": len(chunk.split()),  # rough estimate
-            "language": language,
+            "document_id": str(job.document_id),
+            "agent_ids": [str(job.agent_id)],
+            "token_count": token_counts[idx],
+            "language": job.language,
             "source_page": None,
         }
-        docs_to_index.append(meta)
+        job.docs_to_index.append(meta)
         # console.print(Pretty(meta))
 
-    # embed with batching to respect token limits
-    doc.document_status = AgentDocumentProcessingStatus.EMBEDDING_AND_STORING_IN_ES
-    await session.commit()
 
-    async def batch_embed(texts: List[str], batch_size: int = 500) -> List[List[float]]:
-        vectors = []
-        for i in range(0, len(texts), batch_size):
-            batch = texts[i: i + batch_size]
-            batch_vectors = await es_client.embed(batch)
-            vectors.extend(batch_vectors)
-        return vectors
+INDEX_MAX_IN_FLIGHT = 2  # bulk_index calls allowed to run while the next batch is embedded
+
 
-    embeddings = await batch_embed(embeddings_input, batch_size=500)
-    for meta, vector in zip(docs_to_index, embeddings):
-        meta["embedding"] = vector
+async def embed_and_index(docs_to_index: List[dict], batch_size: int = 500) -> None:
+    """
+    Embed chunk texts in batches (to respect token limits) and index each batch
+    as soon as it is embedded, so ES writes overlap the next embed call.
+    Batches are taken off `docs_to_index` as they go, and at most INDEX_MAX_IN_FLIGHT
+    of them are being indexed at once, so a batch is freed as soon as ES has it.
+    """
+    slots = asyncio.Semaphore(INDEX_MAX_IN_FLIGHT)
+    index_tasks: set[asyncio.Task] = set()
 
-    await es_client.bulk_index(docs_to_index)
+    async def index_batch(batch_meta: List[dict]) -> None:
+        try:
+            await es_client.bulk_index(batch_meta)
+        finally:
+            slots.release()
+
+    try:
+        while docs_to_index:
+            batch_meta = docs_to_index[:batch_size]
+            del docs_to_index[:batch_size]
+            batch_vectors = await embed_deduplicated(es_client.embed, [meta["chunk_text"] for meta in batch_meta])
+            for meta, vector in zip(batch_meta, batch_vectors):
+                meta["embedding"] = l2_normalize(vector)
 
-    # finalise
-    doc.document_status = AgentDocumentProcessingStatus.COMPLETED
-    await session.commit()
-    logger.info("✓ Completed document «%s»", doc.document_title)
+            await slots.acquire()
+            for task in [task for task in index_tasks if task.done()]:
+                index_tasks.discard(task)
+                task.result()  # surface a failed batch before embedding more
+            index_tasks.add(asyncio.create_task(index_batch(batch_meta)))
+            del batch_meta, batch_vectors
+    finally:
+        await asyncio.gather(*index_tasks)
 
 
-async def agent_loop(session) -> None:
+EXTRACT_WORKERS = 4
+PIPELINE_QUEUE_SIZE = 2  # bounds how many extracted / chunked documents wait in memory
+
+
+async def process_documents_pipelined(session, jobs: List[DocumentJob]) -> None:
     """
-    Iterate over agents one‑after‑another,
-    processing their attached documents sequentially.
+    Run documents through extract → chunk → embed/index as overlapping stages:
+    while one document is embedding, the next is being chunked and later ones
+    are being extracted/OCR'd. Bounded queues keep memory in check.
+    Each stage commits its status as a document enters it, so pollers on other sessions
+    follow the document through EXTRACTING / CHUNKING / EMBEDDING to its terminal status.
+    The stages share one session, so status writes are serialized with a lock and each
+    commit carries only that one change. Documents are read after those commits, which
+    relies on the session's expire_on_commit=False.
     """
-    result = await session.execute(select(Agent))
-    agents = result.scalars().all()
-
-    for agent in agents:
-        agent_read = await agent_manager.get_agent_by_id(session, agent.agent_id)
-        logger.info("=== Agent %s (%s) ===", agent_read.name, agent.agent_id)
-        # Explicitly load this agent’s documents via join
-        result = await session.execute(
-            select(Document)
-            .join(AgentDocument, Document.document_id == AgentDocument.document_id)
-            .where(AgentDocument.agent_id == agent.agent_id)
-        )
-
-        for doc in result.scalars().all():
-            if doc.document_status == AgentDocumentProcessingStatus.COMPLETED:
+    extract_q: asyncio.Queue = asyncio.Queue()
+    chunk_q: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+    embed_q: asyncio.Queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+
+    session_lock = asyncio.Lock()
+
+    async def set_status(doc: Document, status: AgentDocumentProcessingStatus) -> None:
+        async with session_lock:
+            doc.document_status = status
+            await session.commit()
+
+    for job in jobs:
+        extract_q.put_nowait(job)
+    for _ in range(EXTRACT_WORKERS):
+        extract_q.put_nowait(None)
+
+    async def extract_worker() -> None:
+        while (job := await extract_q.get()) is not None:
+            logger.info("▶︎ Extracting document «%s» (%s)", job.doc.document_title, job.doc.document_id)
+            await set_status(job.doc, AgentDocumentProcessingStatus.EXTRACTING_TEXT)
+            try:
+                await extract_stage(job)
+            except Exception as e:
+                logger.error("Extraction stage failed for %s: %s", job.doc.name_with_ext, e)
+                job.status = AgentDocumentProcessingStatus.EXTRACTING_TEXT_FAILED
+            await chunk_q.put(job)
+
+    async def chunk_worker() -> None:
+        while (job := await chunk_q.get()) is not None:
+            if job.status is None:
+                await set_status(job.doc, AgentDocumentProcessingStatus.CHUNKING_TEXT_SEMANTICALLY)
+                try:
+                    await asyncio.to_thread(chunk_stage, job)
+                except Exception as e:
+                    logger.error("Chunking stage failed for %s: %s", job.name_with_ext, e)
+                    job.status = AgentDocumentProcessingStatus.CHUNKING_TEXT_SEMANTICALLY_FAILED
+            await embed_q.put(job)
+        await embed_q.put(None)
+
+    async def embed_worker() -> None:
+        while (job := await embed_q.get()) is not None:
+            doc = job.doc
+            if job.status is not None:
+                await set_status(doc, job.status)
                 continue
-            await process_document(session, agent.agent_id, doc)  # sequential per doc
+
+            await set_status(doc, AgentDocumentProcessingStatus.EMBEDDING_AND_STORING_IN_ES)
+            try:
+                await embed_and_index(job.docs_to_index, batch_size=500)
+            except Exception as e:
+                logger.error("Embedding/indexing failed for %s: %s", doc.name_with_ext, e)
+                await set_status(doc, AgentDocumentProcessingStatus.EMBEDDING_AND_STORING_IN_ES_FAILED)
+                continue
+
+            await set_status(doc, AgentDocumentProcessingStatus.COMPLETED)
+            logger.info("✓ Completed document «%s»", doc.document_title)
+
+    async def extract_stage_done() -> None:
+        await asyncio.gather(*(extract_worker() for _ in range(EXTRACT_WORKERS)))
+        await chunk_q.put(None)
+
+    await asyncio.gather(extract_stage_done(), chunk_worker(), embed_worker())
+
+
+async def load_agent_documents(session) -> dict[UUID, List[Document]]:
+    """
+    Fetch every (agent_id, Document) pair in one query, grouped by agent.
+    """
+    result = await session.execute(
+        select(AgentDocument.agent_id, Document)
+        .join(Document, Document.document_id == AgentDocument.document_id)
+    )
+    agent_docs: dict[UUID, List[Document]] = defaultdict(list)
+    for agent_id, doc in result.all():
+        agent_docs[agent_id].append(doc)
+    return agent_docs
 
 
 async def main() -> None:
     raw_doc_names = get_raw_doc_names()
-    used_doc_names = set()
 
+    try:
+        await _index_documents(raw_doc_names)
+    finally:
+        _PDF_POOL.shutdown()
+
+
+async def _index_documents(raw_doc_names: set) -> None:
     async with AsyncSessionLocal() as session:
+        # only an index this run creates is relaxed for the ingest; a live one keeps serving as is
+        index_created = not await es_client.elastic_client.indices.exists(index=es_client.rag_index_name)
         await es_client.initialize_client()
 
         await agent_manager.load_agent_data(db=session, load=True)
         result = await session.execute(select(Agent))
         agents = result.scalars().all()
 
-        for agent in agents:
-            # load docs for validation
-            result = await session.execute(
-                select(Document)
-                .join(AgentDocument, Document.document_id == AgentDocument.document_id)
-                .where(AgentDocument.agent_id == agent.agent_id)
-            )
-
-            for doc in result.scalars().all():
-                used_doc_names.add(doc.name_with_ext)
+        # load docs once; used for validation and processing
+        agent_docs = await load_agent_documents(session)
+        used_doc_names = {doc.name_with_ext for docs in agent_docs.values() for doc in docs}
 
         prevalidate(raw_doc_names, used_doc_names)
 
@@ -490,31 +745,39 @@ async def main() -> None:
         global PROCESS_ONLY_FOUND_FILES
         PROCESS_ONLY_FOUND_FILES = (choice == "y")
 
-        # Now re-iterate to actually process the documents
-        for agent in agents:
-            agent_read = await agent_manager.get_agent_by_id(session, agent.agent_id)
-            logger.info("=== Agent %s (%s) ===", agent_read.name, agent.agent_id)
+        # core's ESClient has no bulk-mode methods; drive its underlying client directly
+        ingest_mode = (bulk_ingest_mode(es_client.elastic_client, es_client.rag_index_name)
+                       if index_created else nullcontext())
+        async with ingest_mode:
+            # Now re-iterate to collect the documents to process
+            jobs = []
+            queued_doc_ids = set()
+            for agent in agents:
+                agent_read = await agent_manager.get_agent_by_id(session, agent.agent_id)
+                logger.info("=== Agent %s (%s) ===", agent_read.name, agent.agent_id)
+
+                docs = agent_docs.get(agent.agent_id, [])
+
+                # console.print(f"[bold cyan]Documents for agent {agent.name} ({agent.agent_id}):[/bold cyan]")
+                # console.print(Pretty([doc.name_with_ext for doc in docs]))
 
-            result = await session.execute(
-                select(Document)
-                .join(AgentDocument, Document.document_id == AgentDocument.document_id)
-                .where(AgentDocument.agent_id == agent.agent_id)
-            )
-            docs = result.scalars().all()
+                for doc in docs:
+                    file_path = RAW_DIR / doc.name_with_ext
+                    if PROCESS_ONLY_FOUND_FILES and not file_path.exists():
+                        # console.print(f"[yellow]⚠ Skipping missing file:[/yellow] {file_path.name}")
+                        continue
 
-            # console.print(f"[bold cyan]Documents for agent {agent.name} ({agent.agent_id}):[/bold cyan]")
-            # console.print(Pretty([doc.name_with_ext for doc in docs]))
+                    if doc.document_status == AgentDocumentProcessingStatus.COMPLETED:
+                        continue
 
-            for doc in docs:
-                file_path = RAW_DIR / doc.name_with_ext
-                if PROCESS_ONLY_FOUND_FILES and not file_path.exists():
-                    # console.print(f"[yellow]⚠ Skipping missing file:[/yellow] {file_path.name}")
-                    continue
+                    # a document shared by several agents is indexed once, by the first agent
+                    if doc.document_id in queued_doc_ids:
+                        continue
+                    queued_doc_ids.add(doc.document_id)
 
-                if doc.document_status == AgentDocumentProcessingStatus.COMPLETED:
-                    continue
+                    jobs.append(DocumentJob(agent_id=agent.agent_id, doc=doc))
 
-                await process_document(session, agent.agent_id, doc)
+            await process_documents_pipelined(session, jobs)
 
         await es_client.close()
 
@@ -0,0 +1,33 @@
+from typing import List
+
+from shared.utils.micro_batcher import MicroBatcher
+
+
+class EmbeddingBatcher(MicroBatcher):
+    """
+    Coalesces concurrent single-text embedding requests into one `aembed_documents` call.
+    One instance per embedding model name, so callers with different models never share
+    a batch and every caller of the same model does.
+    """
+    _instances: dict = {}
+
+    def __new__(cls, embed_model, *args, **kwargs):
+        instance = cls._instances.get(embed_model.model)
+        if instance is None:
+            instance = cls._instances[embed_model.model] = super(EmbeddingBatcher, cls).__new__(cls)
+            instance._initialized = False
+        return instance
+
+    def __init__(self, embed_model, max_batch_size: int = 64, window: float = 0.025):
+        if self._initialized:
+            return
+        self._initialized = True
+
+        super().__init__(max_batch_size=max_batch_size, window=window)
+        self.embed_model = embed_model
+
+    async def embed(self, text: str) -> List[float]:
+        return await self.submit(text)
+
+    async def _process_batch(self, items: List[str]) -> List[List[float]]:
+        return await self.embed_model.aembed_documents(items)
@@ -0,0 +1,102 @@
+import asyncio
+import hashlib
+import time
+from collections import OrderedDict
+from typing import Awaitable, Callable, List, Optional
+
+import numpy as np
+
+
+def canonical_text(text: str) -> str:
+    return text.strip().casefold()
+
+
+async def embed_deduplicated(
+        aembed: Callable[[List[str]], Awaitable[List[List[float]]]],
+        texts: List[str],
+) -> List[List[float]]:
+    """
+    Call `aembed` once per distinct canonical text and fan results back out in input order.
+    The first occurrence of each text is the one sent for embedding.
+    """
+    slot_of: dict[str, int] = {}
+    unique_texts: List[str] = []
+    slots = []
+    for text in texts:
+        key = canonical_text(text)
+        slot = slot_of.get(key)
+        if slot is None:
+            slot = slot_of[key] = len(unique_texts)
+            unique_texts.append(text)
+        slots.append(slot)
+
+    if not unique_texts:
+        return []
+    vectors = await aembed(unique_texts)
+    return [vectors[slot] for slot in slots]
+
+
+class CachedEmbeddings:
+    """
+    Content-addressed LRU cache in front of a LangChain embeddings model.
+
+    Entries are keyed on a hash of (model, text) and stored as float32 arrays;
+    they expire after `ttl` seconds and the least recently used entry is evicted
+    once `capacity` is reached.
+    """
+
+    def __init__(self, embed_model, capacity: int = 1_000, ttl: float = 1800):
+        self.embed_model = embed_model
+        self.model: str = getattr(embed_model, "model", "")
+        self.capacity = capacity
+        self.ttl = ttl
+        self._entries: OrderedDict[bytes, tuple[float, np.ndarray]] = OrderedDict()
+        self._lock = asyncio.Lock()
+
+    def _key(self, text: str) -> bytes:
+        return hashlib.blake2b(f"{self.model}\0{text}".encode("utf-8"), digest_size=16).digest()
+
+    def _get(self, key: bytes, now: float) -> Optional[np.ndarray]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, vector = entry
+        if expires_at <= now:
+            del self._entries[key]
+            return None
+        self._entries.move_to_end(key)
+        return vector
+
+    def _put(self, key: bytes, vector: List[float], now: float) -> np.ndarray:
+        array = np.asarray(vector, dtype=np.float32)
+        self._entries[key] = (now + self.ttl, array)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.capacity:
+            self._entries.popitem(last=False)
+        return array
+
+    async def aembed_query(self, text: str) -> List[float]:
+        return (await self.aembed_documents([text]))[0]
+
+    async def aembed_documents(self, texts: List[str]) -> List[List[float]]:
+        """
+        Embed `texts`, calling the underlying model only for cache misses.
+        Results are returned in input order.
+        """
+        keys = [self._key(text) for text in texts]
+        results: List[Optional[np.ndarray]] = [None] * len(texts)
+
+        async with self._lock:
+            now = time.monotonic()
+            for i, key in enumerate(keys):
+                results[i] = self._get(key, now)
+
+        misses = [i for i, vector in enumerate(results) if vector is None]
+        if misses:
+            vectors = await self.embed_model.aembed_documents([texts[i] for i in misses])
+            async with self._lock:
+                now = time.monotonic()
+                for i, vector in zip(misses, vectors):
+                    results[i] = self._put(keys[i], vector, now)
+
+        return [vector.tolist() for vector in results]
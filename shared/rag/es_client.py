@@ -1,10 +1,64 @@
 import os
+from contextlib import asynccontextmanager
 
+import orjson
 from elasticsearch import AsyncElasticsearch
+from elasticsearch.serializer import NdjsonSerializer, OrjsonSerializer
 from langchain_community.embeddings import OpenAIEmbeddings
 
 from shared import shared_settings
 from shared.rag.es_enums import EsEnums
+from shared.rag.msearch_batcher import MultiSearchBatcher
+
+
+class OrjsonNdjsonSerializer(NdjsonSerializer):
+    """NDJSON (bulk) serializer backed by orjson; much faster on embedding vectors."""
+
+    def json_dumps(self, data):
+        return orjson.dumps(data, default=self.default, option=orjson.OPT_SERIALIZE_NUMPY)
+
+
+# Index settings applied for the duration of a large bulk ingest
+BULK_INGEST_INDEX_SETTINGS = {
+    "index.refresh_interval": "-1",
+    "index.translog.durability": "async",
+    # with async durability the translog is fsynced on this interval instead of per request
+    "index.translog.sync_interval": "30s",
+    "index.number_of_replicas": 0,
+}
+
+
+@asynccontextmanager
+async def bulk_ingest_mode(elastic_client: AsyncElasticsearch, index_name: str):
+    """
+    Relax refresh/translog/replica settings on `index_name` for the duration of a bulk
+    ingest, then restore the previous values and refresh so the documents are searchable.
+    `index_name` may be an alias: settings are saved and restored per concrete index,
+    as keyed in the get_settings response.
+    Only use it on an index nothing is serving from yet (freshly created, or built before
+    an alias swap): while it is on, new documents are not searchable, there are no replicas
+    and the last sync interval of writes can be lost. If the process is killed inside the
+    block, the relaxed settings stay on the index.
+    """
+    current = await elastic_client.indices.get_settings(
+        index=index_name,
+        name=list(BULK_INGEST_INDEX_SETTINGS),
+        flat_settings=True,
+    )
+    # a setting missing from the response is on its default; restoring it to None resets it
+    pre_bulk_settings = {
+        concrete_index: {key: body.get("settings", {}).get(key) for key in BULK_INGEST_INDEX_SETTINGS}
+        for concrete_index, body in current.items()
+    }
+    await elastic_client.indices.put_settings(index=index_name, settings=BULK_INGEST_INDEX_SETTINGS)
+    print(f"Index {index_name} switched to bulk-ingest mode.")
+    try:
+        yield
+    finally:
+        for concrete_index, settings in pre_bulk_settings.items():
+            await elastic_client.indices.put_settings(index=concrete_index, settings=settings)
+        await elastic_client.indices.refresh(index=index_name)
+        print(f"Index {index_name} restored from bulk-ingest mode.")
 
 
 class ESClient:
@@ -18,7 +72,8 @@ class ESClient:
 
     async def close(self):
         """Close the Elasticsearch connection."""
-        if hasattr(self, 'es') and self.elastic_client:
+        if getattr(self, 'elastic_client', None):
+            await MultiSearchBatcher.close_for(self.elastic_client)
             await self.elastic_client.close()
             print("Closed Elasticsearch connection.")
 
@@ -41,7 +96,11 @@ class ESClient:
             ca_certs=os.path.join(os.path.dirname(__file__), 'ts_http_ca.crt'),
             timeout=60,  # Increase the timeout (in seconds)
             max_retries=3,  # Add retries in case of temporary failures
-            retry_on_timeout=True  # Retry if there's a timeout
+            retry_on_timeout=True,  # Retry if there's a timeout
+            serializers={
+                OrjsonSerializer.mimetype: OrjsonSerializer(),
+                OrjsonNdjsonSerializer.mimetype: OrjsonNdjsonSerializer(),
+            },
         )
         print("Connected to Elasticsearch.")
 
@@ -58,4 +117,3 @@ class ESClient:
             print(f"Created index: {self.rag_index_name}")
         else:
             print(f"Index {self.rag_index_name} already exists.")
-
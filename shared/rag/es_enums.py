@@ -25,6 +25,25 @@ DEFAULT_TS_RAG_INDEX_MAPPING = {
     }
 }
 
+# Same as the default RAG mapping, but the HNSW graph stores int8-quantized vectors
+# (4x smaller off-heap footprint). Vectors are still sent and stored as floats.
+# Vectors are L2-normalized at ingest and query time, so dot_product ranks exactly
+# like cosine without ES recomputing magnitudes per comparison.
+INT8_TS_RAG_INDEX_MAPPING = {
+    "mappings": {
+        "properties": {
+            **DEFAULT_TS_RAG_INDEX_MAPPING["mappings"]["properties"],
+            "embedding": {
+                "type": "dense_vector",
+                "dims": 3072,
+                "index": True,
+                "similarity": "dot_product",
+                "index_options": {"type": "int8_hnsw"}
+            },
+        }
+    }
+}
+
 DEFAULT_TS_CHATTING_INDEX_MAPPING = {
     "mappings": {
         "properties": {
@@ -91,6 +110,28 @@ DEFAULT_TS_CHATTING_INDEX_MAPPING = {
     }
 }
 
+# Interaction embeddings are only ever compared approximately, so the v4 chatting indexes
+# store their HNSW graphs int8-quantized as well (floats are kept on disk for rescoring).
+# Existing v3 indexes keep their mapping; a v4 chatting index starts empty.
+_INT8_CHATTING_EMBEDDING = {
+    "type": "dense_vector",
+    "dims": 3072,  # This corresponds to TEXT_EMBED_3_LARGE dimensions
+    "index": True,
+    "similarity": "cosine",
+    "index_options": {"type": "int8_hnsw"}
+}
+
+INT8_TS_CHATTING_INDEX_MAPPING = {
+    "mappings": {
+        "properties": {
+            **DEFAULT_TS_CHATTING_INDEX_MAPPING["mappings"]["properties"],
+            "inquiry_embedding": _INT8_CHATTING_EMBEDDING,
+            "response_embedding": _INT8_CHATTING_EMBEDDING,
+            "interaction_embedding": _INT8_CHATTING_EMBEDDING,
+        }
+    }
+}
+
 
 class EsEnums:
     @staticmethod
@@ -99,19 +140,12 @@ class EsEnums:
 
     @staticmethod
     def get_rag_index_based_on_settings():
-        if settings.THEOSUMMA_ES_INDEX == EsEnums.DevIndexV1.RAG_INDEX_NAME:
-
-            return EsEnums.DevIndexV1()
-        elif settings.THEOSUMMA_ES_INDEX == EsEnums.ProdIndexV1.RAG_INDEX_NAME:
-            return EsEnums.ProdIndexV1()
+        # raises KeyError early if THEOSUMMA_ES_INDEX names an unknown index
+        return _RAG_INDEX_MAP[settings.THEOSUMMA_ES_INDEX]
 
     @staticmethod
     def get_chatting_index_based_on_settings():
-        if settings.THEOSUMMA_ES_CHATTING_INDEX == EsEnums.DevIndexV1.CHATTING_INDEX_NAME:
-
-            return EsEnums.DevIndexV1()
-        elif settings.THEOSUMMA_ES_CHATTING_INDEX == EsEnums.ProdIndexV1.CHATTING_INDEX_NAME:
-            return EsEnums.ProdIndexV1()
+        return _CHATTING_INDEX_MAP[settings.THEOSUMMA_ES_CHATTING_INDEX]
 
     class DevIndexV1:
         RAG_INDEX_NAME = "theosumma_dev_index_v3"
@@ -124,3 +158,26 @@ class EsEnums:
         CHATTING_INDEX_NAME = "theosumma_prod_chatting_index_v3"
         MAPPINGS_TO_CREATE_RAG_INDEX = DEFAULT_TS_RAG_INDEX_MAPPING
         MAPPINGS_TO_CREATE_CHATTING_INDEX = DEFAULT_TS_CHATTING_INDEX_MAPPING
+
+    class DevIndexV4:
+        RAG_INDEX_NAME = "theosumma_dev_index_v4"
+        CHATTING_INDEX_NAME = "theosumma_dev_chatting_index_v4"
+        MAPPINGS_TO_CREATE_RAG_INDEX = INT8_TS_RAG_INDEX_MAPPING
+        MAPPINGS_TO_CREATE_CHATTING_INDEX = INT8_TS_CHATTING_INDEX_MAPPING
+
+    class ProdIndexV4:
+        RAG_INDEX_NAME = "theosumma_prod_index_v4"
+        CHATTING_INDEX_NAME = "theosumma_prod_chatting_index_v4"
+        MAPPINGS_TO_CREATE_RAG_INDEX = INT8_TS_RAG_INDEX_MAPPING
+        MAPPINGS_TO_CREATE_CHATTING_INDEX = INT8_TS_CHATTING_INDEX_MAPPING
+
+
+# Built once at import; the index classes are stateless so one instance each is shared.
+_RAG_INDEX_MAP = {
+    index.RAG_INDEX_NAME: index
+    for index in (EsEnums.DevIndexV1(), EsEnums.ProdIndexV1(), EsEnums.DevIndexV4(), EsEnums.ProdIndexV4())
+}
+_CHATTING_INDEX_MAP = {
+    index.CHATTING_INDEX_NAME: index
+    for index in (EsEnums.DevIndexV1(), EsEnums.ProdIndexV1(), EsEnums.DevIndexV4(), EsEnums.ProdIndexV4())
+}
@@ -1,69 +1,149 @@
 import logging
+from contextlib import aclosing
+from typing import AsyncIterator
 
 from shared.config import shared_settings
+from shared.rag.embedding_batcher import EmbeddingBatcher
+from shared.rag.embedding_cache import CachedEmbeddings
 from shared.rag.es_client import ESClient
 from langchain_openai import OpenAIEmbeddings
 
 from shared.rag.es_enums import EsEnums
+from shared.rag.msearch_batcher import MultiSearchBatcher
+from shared.rag.vectors import l2_normalize
 from shared.utils.logger import TsLogger
 
 logger = TsLogger(name=__name__)
 
+# Above this many hits a plain query is paged through a point-in-time instead of one big `size`.
+STREAM_THRESHOLD = 500
+# ES caps kNN `k` and `num_candidates` at this value.
+MAX_KNN_CANDIDATES = 10_000
+
+# Chunk fields callers actually read off a hit (both the chunk_embedder and the
+# document_chunker naming are covered); everything else, notably the embedding,
+# stays on the ES side.
+_SOURCE_INCLUDES = [
+    "document_id", "text", "chunk_text", "page_number", "source_page", "hash", "chunk_hash",
+    "prev_chunk_hash", "next_chunk_hash", "chunk_sequence",
+]
+
+
+# One cached embeddings model per model name for the whole process, so every handler
+# shares the same LRU and, through it, the same EmbeddingBatcher.
+_cached_embeddings: dict[str, CachedEmbeddings] = {}
+
+
+def get_cached_embeddings(model: str) -> CachedEmbeddings:
+    embed_model = _cached_embeddings.get(model)
+    if embed_model is None:
+        embed_model = _cached_embeddings[model] = CachedEmbeddings(OpenAIEmbeddings(
+            model=model,
+            openai_api_key=shared_settings.OPENAI_API_KEY
+        ), capacity=shared_settings.EMBEDDING_CACHE_SIZE)
+    return embed_model
+
 
 class ElasticsearchQueryHandler:
+    # Fixed part of every kNN clause; per-query leaves are merged in with a shallow copy.
+    _KNN_TEMPLATE = {"field": "embedding"}
+    # Metadata fields indexed as keywords, i.e. the ones search_and_filter can term-filter on.
+    _KEYWORD_FILTER_FIELDS = frozenset({"document_id", "prev_chunk_hash", "next_chunk_hash", "hash"})
+
     def __init__(self, es_client: ESClient):
         """
         Initialize the ElasticsearchQueryHandler.
         """
         self.es = es_client
         self.rag_index_name = shared_settings.THEOSUMMA_ES_INDEX
-        self.embed_model = OpenAIEmbeddings(
-            model=EsEnums.get_embedding_model(),
-            openai_api_key=shared_settings.OPENAI_API_KEY
-        )
+        self.embed_model = get_cached_embeddings(EsEnums.get_embedding_model())
+        # concurrent queries share one embeddings round-trip and one _msearch round-trip
+        self.embed_batcher = EmbeddingBatcher(self.embed_model)
+        self.msearch_batcher = MultiSearchBatcher(self.es.elastic_client, self.rag_index_name)
 
+    async def _search(self, body: dict, top_k: int) -> list[dict]:
+        return await self.msearch_batcher.search({**body, "size": top_k, "_source": {"includes": _SOURCE_INCLUDES}})
+
+    async def query_stream(self, query_body: dict, page_size: int = 200) -> AsyncIterator[dict]:
+        """
+        Yield every hit of `query_body` page by page using a point-in-time and
+        `search_after`, so deep result sets never need a coordinator-side heap of `size`.
+        """
+        pit = await self.es.elastic_client.open_point_in_time(index=self.rag_index_name, keep_alive="1m")
+        pit_id = pit["id"]
+        search_after = None
+        try:
+            while True:
+                body = {
+                    **query_body,
+                    "pit": {"id": pit_id, "keep_alive": "1m"},
+                    "sort": [{"_score": "desc"}, {"_shard_doc": "asc"}],
+                    "size": page_size,
+                    "_source": {"includes": _SOURCE_INCLUDES},
+                }
+                if search_after is not None:
+                    body["search_after"] = search_after
+                response = await self.es.elastic_client.search(body=body)
+                hits = response["hits"]["hits"]
+                if not hits:
+                    return
+                pit_id = response.get("pit_id", pit_id)
+                for hit in hits:
+                    yield hit
+                if len(hits) < page_size:
+                    return
+                search_after = hits[-1]["sort"]
+        finally:
+            await self.es.elastic_client.close_point_in_time(id=pit_id)
 
     async def query_by_metadata(self, query_params, top_k: int = 10):
         """
         Perform a metadata search based on the provided query parameters.
         """
-        # Build the Elasticsearch query
-        query = {"bool": {"must": [{"match": {k: v}} for k, v in query_params.items()]}}
+        # Keyword fields are exact lookups and go in (cacheable, unscored) filter context;
+        # text fields stay scored matches so the top_k hits are the most relevant ones.
+        query = {"bool": {
+            "must": [{"match": {k: v}} for k, v in query_params.items() if k not in self._KEYWORD_FILTER_FIELDS],
+            "filter": [{"term": {k: v}} for k, v in query_params.items() if k in self._KEYWORD_FILTER_FIELDS],
+        }}
         try:
-            response = await self.es_client.elastic_client.search(
-                index=self.rag_index_name,
-                body={"query": query},
-                size=top_k  # Adjust the number of results as needed
-            )
-            return response["hits"]["hits"]
+            if top_k > STREAM_THRESHOLD:
+                hits = []
+                async with aclosing(self.query_stream({"query": query})) as stream:
+                    async for hit in stream:
+                        hits.append(hit)
+                        if len(hits) >= top_k:
+                            break
+                return hits
+            return await self._search({"query": query}, top_k)
         except Exception as e:
             logger.error(f"Error 1, querying Elasticsearch: {str(e)}")
             return []
 
+    @staticmethod
+    def _knn_clause(query_embedding: list[float], top_k: int, filters: list[dict] | None = None) -> dict:
+        """
+        Native HNSW kNN clause on the `embedding` dense_vector field.
+        Filters are applied during the graph search, so top_k hits all match them.
+        """
+        knn = {
+            **ElasticsearchQueryHandler._KNN_TEMPLATE,
+            "query_vector": query_embedding,
+            "k": min(top_k, MAX_KNN_CANDIDATES),
+            "num_candidates": min(max(top_k * 10, 100), MAX_KNN_CANDIDATES),
+        }
+        if filters:
+            knn["filter"] = filters
+        return knn
+
     async def query_by_embedding(self, query_text, top_k: int = 10):
         """
         Perform a semantic search by embedding the query text and comparing with stored embeddings.
         """
         try:
-            query_embedding = self.embed_model.embed_query(query_text)
-
-            # Build the Elasticsearch query using `dense_vector` for semantic search
-            query = {
-                "script_score": {
-                    "query": {"match_all": {}},
-                    "script": {
-                        "source": "cosineSimilarity(params.query_embedding, 'embedding') + 1.0",
-                        "params": {"query_embedding": query_embedding}
-                    }
-                }
-            }
-
-            response = await self.es_client.elastic_client.search(
-                index=self.rag_index_name,
-                body={"query": query},
-                size=top_k  # Adjust the number of results as needed
-            )
-            return response["hits"]["hits"]
+            query_embedding = l2_normalize(await self.embed_batcher.embed(query_text))
+
+            return await self._search({"knn": self._knn_clause(query_embedding, top_k)}, top_k)
         except Exception as e:
             logger.error(f"Error 2, querying Elasticsearch: {str(e)}")
             return []
@@ -83,46 +163,17 @@ class ElasticsearchQueryHandler:
             :param top_k:
         """
         try:
-            query_embedding = self.embed_model.embed_query(query_text)
-
-            # Build the Elasticsearch query
-            query = {
-                "bool": {
-                    "must": [
-                        {
-                            "script_score": {
-                                "query": {"match_all": {}},
-                                "script": {
-                                    "source": "cosineSimilarity(params.query_embedding, 'embedding') + 1.0",
-                                    "params": {"query_embedding": query_embedding}
-                                }
-                            }
-                        }
-                    ]
-                }
-            }
+            query_embedding = l2_normalize(await self.embed_batcher.embed(query_text))
 
             # Apply metadata filters if provided
-            if metadata_filters:
-                filter_clauses = []
-                for key, value in metadata_filters.items():
-                    if key in ["document_id", "prev_chunk_hash", "next_chunk_hash", "hash"]:  # Fields that are keywords
-                        filter_clauses.append({
-                            "term": {
-                                key: value
-                            }
-                        })
-
-                query["bool"]["filter"] = filter_clauses
+            filter_clauses = [
+                {"term": {key: value}}
+                for key, value in (metadata_filters or {}).items()
+                if key in self._KEYWORD_FILTER_FIELDS
+            ]
 
             # Execute the query
-            response = await self.es_client.elastic_client.search(
-                index=self.rag_index_name,
-                body={"query": query},
-                size=top_k  # Adjust the number of results as needed
-            )
-
-            return response["hits"]["hits"]
+            return await self._search({"knn": self._knn_clause(query_embedding, top_k, filter_clauses)}, top_k)
 
         except Exception as e:
             logger.error(f"Error 3, querying Elasticsearch: {str(e)}")
@@ -141,36 +192,14 @@ class ElasticsearchQueryHandler:
             list: A list of search hits matching both the semantic search and document_id filters.
         """
         try:
-            query_embedding = self.embed_model.embed_query(query_text)
-
-            # Build the Elasticsearch query
-            query = {
-                "bool": {
-                    "must": [
-                        {
-                            "script_score": {
-                                "query": {"match_all": {}},
-                                "script": {
-                                    "source": "cosineSimilarity(params.query_embedding, 'embedding') + 1.0",
-                                    "params": {"query_embedding": query_embedding}
-                                }
-                            }
-                        }
-                    ],
-                    "filter": [
-                        {"terms": {"document_id": document_ids}}  # Filter by document IDs
-                    ]
-                }
-            }
+            query_embedding = l2_normalize(await self.embed_batcher.embed(query_text))
 
-            # Execute the query
-            response = await self.es_client.elastic_client.search(
-                index=self.rag_index_name,
-                body={"query": query},
-                size=top_k  # Adjust the number of results as needed
-            )
+            filter_clauses = [
+                {"terms": {"document_id": document_ids}}  # Filter by document IDs
+            ]
 
-            return response["hits"]["hits"]
+            # Execute the query
+            return await self._search({"knn": self._knn_clause(query_embedding, top_k, filter_clauses)}, top_k)
 
         except Exception as e:
             logger.error(f"Error 4, querying Elasticsearch: {str(e)}")
@@ -3,7 +3,9 @@ from shared.enums import OpenAIModelSlugEnum
 from shared.rag.es_client import ESClient
 from langchain_openai import OpenAIEmbeddings
 
+from shared.rag.embedding_cache import embed_deduplicated
 from shared.rag.es_enums import EsEnums
+from shared.rag.vectors import l2_normalize
 
 
 class ElasticsearchWriteHandler:
@@ -16,4 +18,19 @@ class ElasticsearchWriteHandler:
         self.embed_model = OpenAIEmbeddings(
             model=EsEnums.get_embedding_model(),
             openai_api_key=shared_settings.OPENAI_API_KEY
-        )
\ No newline at end of file
+        )
+
+    def embed_for_index(self, text: str) -> list[float]:
+        """
+        Embed `text` for storage; vectors are L2-normalized so dot_product indexes
+        can score them directly.
+        """
+        return l2_normalize(self.embed_model.embed_query(text))
+
+    async def embed_batch(self, texts: list[str]) -> list[list[float]]:
+        """
+        Embed a batch for storage, sending each distinct text (ignoring case and
+        surrounding whitespace) to the model only once.
+        """
+        vectors = await embed_deduplicated(self.embed_model.aembed_documents, texts)
+        return [l2_normalize(vector) for vector in vectors]
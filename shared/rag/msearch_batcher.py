@@ -0,0 +1,64 @@
+from typing import List
+
+from shared.utils.micro_batcher import MicroBatcher
+
+
+class MultiSearchBatcher(MicroBatcher):
+    """
+    Coalesces concurrent searches against one index into a single `_msearch` request.
+    Each caller gets back the `hits.hits` of its own search.
+    One instance per (client, index), so searches are only ever batched with searches
+    against the same index; `close_for(client)` drops a client's instances when it closes.
+    """
+    _instances: dict = {}
+
+    def __new__(cls, elastic_client, index_name, *args, **kwargs):
+        key = (elastic_client, index_name)
+        instance = cls._instances.get(key)
+        if instance is None:
+            instance = cls._instances[key] = super(MultiSearchBatcher, cls).__new__(cls)
+            instance._initialized = False
+        return instance
+
+    def __init__(self, elastic_client, index_name: str, max_batch_size: int = 32, window: float = 0.025):
+        if self._initialized:
+            return
+        self._initialized = True
+
+        super().__init__(max_batch_size=max_batch_size, window=window)
+        self.elastic_client = elastic_client
+        self.index_name = index_name
+
+    @classmethod
+    async def close_for(cls, elastic_client) -> None:
+        """
+        Stop and forget every batcher of `elastic_client`.
+        """
+        for key in [key for key in cls._instances if key[0] is elastic_client]:
+            await cls._instances.pop(key).close()
+
+    async def search(self, body: dict) -> List[dict]:
+        return await self.submit(body)
+
+    async def msearch(self, bodies: List[dict]) -> List[List[dict] | Exception]:
+        """
+        Send `bodies` as one `_msearch` request. A failed search comes back as an
+        exception in its slot instead of failing the whole batch.
+        """
+        searches = []
+        for body in bodies:
+            searches.append({"index": self.index_name})
+            searches.append(body)
+
+        response = await self.elastic_client.msearch(searches=searches)
+
+        results = []
+        for item in response["responses"]:
+            if "error" in item:
+                results.append(RuntimeError(f"msearch item failed: {item['error']}"))
+            else:
+                results.append(item["hits"]["hits"])
+        return results
+
+    async def _process_batch(self, items: List[dict]) -> List[List[dict] | Exception]:
+        return await self.msearch(items)
@@ -0,0 +1,15 @@
+from typing import List, Sequence
+
+import numpy as np
+
+
+def l2_normalize(vector: Sequence[float]) -> List[float]:
+    """
+    Scale `vector` to unit length (float32), so dot product equals cosine similarity.
+    Zero vectors are returned unchanged.
+    """
+    v = np.asarray(vector, dtype=np.float32)
+    norm = np.linalg.norm(v)
+    if norm == 0:
+        return v.tolist()
+    return (v / norm).tolist()
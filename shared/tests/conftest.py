@@ -0,0 +1,37 @@
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# SharedSettings is instantiated as soon as the `shared` package is imported and has no
+# defaults for these. This directory is not a package, so pytest loads this file before
+# anything imports `shared`: load shared/.env the way shared.config does, then give the
+# test run placeholder values only for what neither it nor the environment provides.
+if "KUBERNETES_PORT" not in os.environ:
+    load_dotenv(Path(__file__).resolve().parents[1] / ".env")
+
+_REQUIRED_SETTINGS = {
+    "K8S_NAMESPACE": "test",
+    "ENCRYPTION_KEY": "test",
+    "SYSTEM_ID": "test",
+    "API_KEY": "test",
+    "SERVICES_API_KEY": "test",
+    "JWT_ALGORITHM": "HS256",
+    "JWT_AT_SECRET": "test",
+    "ZOHO_SMTP_SERVER": "localhost",
+    "ZOHO_SMTP_PORT": "587",
+    "ZOHO_EMAIL": "test@example.com",
+    "ZOHO_PASSWORD": "test",
+    "OPENAI_API_KEY": "test",
+    "OPENAI_PROJECT_ID": "test",
+    "OPENAI_ORG_ID": "test",
+    "THEOSUMMA_ES_INDEX": "theosumma_dev_index_v4",
+    "LOGO_URL": "https://theosumma.com/logo.png",
+    "CURRENT_MICRO_SERVICE_NAME": "core-service",
+}
+for _service in ("CORE", "IDENTITY", "SUBSCRIPTION", "COMMUNITY", "DOC_CHATTING", "BIBLE", "ASSESSMENTS", "NOTIFICATIONS"):
+    _REQUIRED_SETTINGS[f"{_service}_SERVICE_ACTIVE"] = "false"
+    _REQUIRED_SETTINGS[f"{_service}_SERVICE_CREATE_ASYNC_USER"] = "false"
+
+for _name, _value in _REQUIRED_SETTINGS.items():
+    os.environ.setdefault(_name, _value)
@@ -0,0 +1,21 @@
+import pytest
+
+pytest.importorskip("elasticsearch")
+
+from shared.rag.es_query_handler import MAX_KNN_CANDIDATES, ElasticsearchQueryHandler
+
+
+class TestKnnClause:
+    @pytest.mark.parametrize("top_k", [MAX_KNN_CANDIDATES, MAX_KNN_CANDIDATES + 1, MAX_KNN_CANDIDATES * 3])
+    def test_k_and_num_candidates_are_capped(self, top_k):
+        knn = ElasticsearchQueryHandler._knn_clause([0.0], top_k)
+
+        assert knn["k"] == MAX_KNN_CANDIDATES
+        assert knn["num_candidates"] == MAX_KNN_CANDIDATES
+        assert knn["k"] <= knn["num_candidates"]
+
+    def test_small_top_k_is_left_alone(self):
+        knn = ElasticsearchQueryHandler._knn_clause([0.0], 5)
+
+        assert knn["k"] == 5
+        assert knn["num_candidates"] == 100
@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+
+from shared.rag.embedding_batcher import EmbeddingBatcher
+from shared.rag.msearch_batcher import MultiSearchBatcher
+from shared.utils.micro_batcher import MicroBatcher
+
+
+class _FakeEmbeddings:
+    def __init__(self, dims: int, model: str | None = None):
+        self.dims = dims
+        self.model = model or f"fake-{dims}"
+        self.batches = []
+
+    async def aembed_documents(self, texts):
+        self.batches.append(list(texts))
+        return [[float(len(text))] * self.dims for text in texts]
+
+
+@pytest.fixture(autouse=True)
+def fresh_batchers(monkeypatch):
+    # batchers are process-wide per model name / client; keep each test's own
+    monkeypatch.setattr(EmbeddingBatcher, "_instances", {})
+    monkeypatch.setattr(MultiSearchBatcher, "_instances", {})
+
+
+class TestBatcherInstances:
+    def test_embedding_batcher_is_shared_per_model(self):
+        model_a, model_b = _FakeEmbeddings(1), _FakeEmbeddings(2)
+
+        assert EmbeddingBatcher(model_a) is EmbeddingBatcher(model_a)
+        assert EmbeddingBatcher(model_a) is not EmbeddingBatcher(model_b)
+        assert EmbeddingBatcher(model_b).embed_model is model_b
+
+    def test_embedding_batcher_is_shared_across_model_instances(self):
+        # handlers each hold their own model object; the same model name must still share a batch
+        assert EmbeddingBatcher(_FakeEmbeddings(3, "shared")) is EmbeddingBatcher(_FakeEmbeddings(3, "shared"))
+
+    def test_msearch_batcher_is_shared_per_client_and_index(self):
+        client = object()
+
+        assert MultiSearchBatcher(client, "index_a") is MultiSearchBatcher(client, "index_a")
+        assert MultiSearchBatcher(client, "index_b").index_name == "index_b"
+        assert MultiSearchBatcher(object(), "index_a") is not MultiSearchBatcher(client, "index_a")
+
+    def test_msearch_batchers_are_dropped_with_their_client(self):
+        client, other_client = object(), object()
+        batcher = MultiSearchBatcher(client, "index_a")
+        MultiSearchBatcher(client, "index_b")
+        other = MultiSearchBatcher(other_client, "index_a")
+
+        async def close_after_use():
+            batcher._ensure_worker()
+            worker = batcher._worker
+            await MultiSearchBatcher.close_for(client)
+            return worker
+
+        worker = asyncio.run(close_after_use())
+
+        assert worker.cancelled()
+        assert all(key[0] is not client for key in MultiSearchBatcher._instances)
+        assert MultiSearchBatcher(other_client, "index_a") is other
+        assert MultiSearchBatcher(client, "index_a") is not batcher
+
+
+class TestMicroBatcherLoops:
+    def test_batches_across_event_loops(self):
+        model = _FakeEmbeddings(1)
+        batcher = EmbeddingBatcher(model)
+
+        async def embed_all(texts):
+            return await asyncio.wait_for(asyncio.gather(*(batcher.embed(text) for text in texts)), timeout=1)
+
+        # both loops stay open, so the first loop's worker is still pending when the second submits
+        first_loop, second_loop = asyncio.new_event_loop(), asyncio.new_event_loop()
+        try:
+            assert first_loop.run_until_complete(embed_all(["a", "bb"])) == [[1.0], [2.0]]
+            assert second_loop.run_until_complete(embed_all(["ccc"])) == [[3.0]]
+            assert first_loop.run_until_complete(embed_all(["dddd"])) == [[4.0]]
+        finally:
+            for loop in (first_loop, second_loop):
+                workers = asyncio.all_tasks(loop)
+                for worker in workers:
+                    worker.cancel()
+                loop.run_until_complete(asyncio.gather(*workers, return_exceptions=True))
+                loop.close()
+        assert model.batches == [["a", "bb"], ["ccc"], ["dddd"]]
+
+
+class _ShortBatcher(MicroBatcher):
+    async def _process_batch(self, items):
+        return items[:-1]
+
+
+class TestMicroBatcherResults:
+    def test_result_count_mismatch_fails_every_caller(self):
+        batcher = _ShortBatcher(max_batch_size=3, window=0.05)
+
+        async def submit_all():
+            try:
+                return await asyncio.wait_for(
+                    asyncio.gather(*(batcher.submit(i) for i in range(3)), return_exceptions=True), timeout=1)
+            finally:
+                await batcher.close()
+
+        results = asyncio.run(submit_all())
+
+        assert len(results) == 3
+        assert all(isinstance(result, RuntimeError) for result in results)
@@ -0,0 +1,191 @@
+from importlib.metadata import version
+from pathlib import Path
+from types import SimpleNamespace
+from uuid import UUID
+
+import h2.config
+import h2.connection
+import httpx
+import msgspec
+import pytest
+from fastapi import HTTPException
+from packaging.requirements import Requirement
+
+from shared.enums import MicroServiceName
+from shared.ts_ms.ms_manager import RETRY_WAIT, MicroServiceInfo, MsManager
+
+REQUIREMENTS_FILE = Path(__file__).resolve().parents[1] / "requirements.txt"
+
+
+class TestMsManagerClients:
+    @pytest.mark.asyncio
+    async def test_http2_client_headers_are_valid_http2(self):
+        client = await MsManager._get_client(http2=True)
+        try:
+            request = client.build_request("GET", "https://core.internal/core/health")
+
+            # the same header list httpcore hands to h2 (it drops only Host and Transfer-Encoding)
+            headers = [
+                (b":method", b"GET"),
+                (b":authority", request.url.netloc),
+                (b":scheme", b"https"),
+                (b":path", request.url.raw_path),
+            ] + [
+                (name.lower(), value)
+                for name, value in request.headers.raw
+                if name.lower() not in (b"host", b"transfer-encoding")
+            ]
+            conn = h2.connection.H2Connection(config=h2.config.H2Configuration(client_side=True))
+            conn.initiate_connection()
+            # raises h2.exceptions.ProtocolError if a header is not allowed on an HTTP/2 stream
+            conn.send_headers(1, headers, end_stream=True)
+        finally:
+            await MsManager.close()
+
+    @pytest.mark.asyncio
+    async def test_clients_are_pooled_per_protocol(self):
+        try:
+            http1 = await MsManager._get_client()
+            http2 = await MsManager._get_client(http2=True)
+            assert http1 is not http2
+            assert await MsManager._get_client() is http1
+            assert await MsManager._get_client(http2=True) is http2
+        finally:
+            await MsManager.close()
+
+
+class TestMsManagerServices:
+    def test_get_service_name_does_not_build_services(self, monkeypatch):
+        monkeypatch.setattr(MsManager, "_service_cache", {})
+
+        assert MsManager.get_service_name("/doc-chatting") == MicroServiceName.DOC_CHATTING_SERVICE.snake()
+        assert MsManager.get_service_name("/unknown") == ""
+        assert MsManager._service_cache == {}
+
+    def test_prefixes_match_the_service_infos(self):
+        for service_name, service_info in MsManager.get_services().items():
+            assert MsManager.get_service_name(service_info.url_prefix) == service_name
+
+
+class TestMsManagerRetries:
+    @pytest.fixture
+    def service(self):
+        MsManager._service_cache["test_service"] = MicroServiceInfo(
+            name=MicroServiceName.CORE_SERVICE,
+            url_prefix="/core",
+            local_development_url="http://core.test",
+            active=True,
+            retries=3,
+        )
+        MsManager._breakers.pop("test_service", None)
+        yield "test_service"
+        MsManager._service_cache.pop("test_service", None)
+        MsManager._breakers.pop("test_service", None)
+
+    def test_tenacity_is_the_pinned_version(self):
+        # the backoff arguments differ between tenacity releases, so run against the pinned one
+        requirements = (Requirement(line) for line in REQUIREMENTS_FILE.read_text().splitlines()
+                        if line.strip() and not line.startswith("#"))
+        tenacity = next(req for req in requirements if req.name == "tenacity")
+        assert tenacity.specifier.contains(version("tenacity"))
+
+    def test_retry_wait_starts_small_and_is_capped(self):
+        first = RETRY_WAIT(SimpleNamespace(attempt_number=1))
+        last = RETRY_WAIT(SimpleNamespace(attempt_number=10))
+        assert 0.1 <= first <= 0.2
+        assert last <= 2.0
+
+    @staticmethod
+    def _use_transport(handler) -> None:
+        MsManager._clients[False] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    @pytest.mark.asyncio
+    async def test_read_timeout_is_not_retried(self, service):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            raise httpx.ReadTimeout("timed out", request=request)
+
+        self._use_transport(handler)
+        try:
+            with pytest.raises(HTTPException) as exc_info:
+                await MsManager.make_request("GET", service, "/health")
+            assert exc_info.value.status_code == 504
+            assert len(calls) == 1
+        finally:
+            await MsManager.close()
+
+    @pytest.mark.asyncio
+    async def test_gateway_error_is_retried_for_idempotent_methods(self, service):
+        calls = []
+
+        def handler(request):
+            calls.append(request)
+            return httpx.Response(503 if len(calls) < 3 else 200, json={})
+
+        self._use_transport(handler)
+        try:
+            response = await MsManager.make_request("GET", service, "/health")
+            assert response.status_code == 200
+            assert len(calls) == 3
+        finally:
+            await MsManager.close()
+
+
+class _Chunk(msgspec.Struct, frozen=True):
+    document_id: UUID
+    text: str
+    embedding: list[float] | None = None
+
+
+class TestMsManagerResponseModel:
+    @pytest.fixture
+    def service(self, monkeypatch):
+        service_info = MicroServiceInfo(
+            name=MicroServiceName.CORE_SERVICE,
+            url_prefix="/core",
+            local_development_url="http://core.test",
+            active=True,
+            retries=3,
+        )
+        monkeypatch.setattr(MsManager, "get_service", classmethod(lambda cls, service_name: service_info))
+        return "test_service"
+
+    @staticmethod
+    def _use_transport(handler) -> None:
+        MsManager._clients[False] = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+
+    @pytest.mark.asyncio
+    async def test_response_is_decoded_into_the_model(self, service):
+        chunk = {
+            "document_id": "0b8e6f2c-6a4e-4a43-9d5f-1f7f6c1b2a10",
+            "text": "In the beginning",
+            "embedding": [0.5, -0.5],
+        }
+        self._use_transport(lambda request: httpx.Response(200, json=[chunk]))
+        try:
+            chunks = await MsManager.get("/chunks", "Error", service_name=service, response_model=list[_Chunk])
+            assert chunks == [_Chunk(document_id=UUID(chunk["document_id"]), text=chunk["text"],
+                                     embedding=[0.5, -0.5])]
+        finally:
+            await MsManager.close()
+
+    @pytest.mark.asyncio
+    async def test_invalid_response_is_a_bad_gateway(self, service):
+        self._use_transport(lambda request: httpx.Response(200, json=[{"text": "missing fields"}]))
+        try:
+            with pytest.raises(HTTPException) as exc_info:
+                await MsManager.get("/chunks", "Error", service_name=service, response_model=list[_Chunk])
+            assert exc_info.value.status_code == 502
+        finally:
+            await MsManager.close()
+
+    @pytest.mark.asyncio
+    async def test_raw_response_without_a_model(self, service):
+        self._use_transport(lambda request: httpx.Response(200, json={"ok": True}))
+        try:
+            response = await MsManager.get("/health", "Error", service_name=service)
+            assert isinstance(response, httpx.Response)
+        finally:
+            await MsManager.close()
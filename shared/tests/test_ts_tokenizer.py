@@ -0,0 +1,49 @@
+from types import SimpleNamespace
+
+import pytest
+
+pytest.importorskip("tiktoken")
+pytest.importorskip("core_service")  # the tokenizer reads model costs through core's service
+
+from core_service.services.open_ai_model import OpenAIModelService
+from shared.enums import OpenAIModelSlugEnum
+from shared.ts_tokenizer import TsTokenizer
+
+
+class TestTsTokenizer:
+    @pytest.fixture
+    def gpt_4o_mini(self, monkeypatch):
+        model = SimpleNamespace(name=OpenAIModelSlugEnum.GPT_4O_MINI.value, input_cost=0.15, output_cost=0.6)
+
+        async def get_model_by_slug(self, model_slug, db):
+            return model if model_slug == OpenAIModelSlugEnum.GPT_4O_MINI else None
+
+        monkeypatch.setattr(OpenAIModelService, "get_model_by_slug", get_model_by_slug)
+        return model
+
+    @pytest.mark.asyncio
+    async def test_tokens_stats_with_slug(self, gpt_4o_mini):
+        tokenizer = await TsTokenizer(OpenAIModelSlugEnum.GPT_4O_MINI).init()
+        assert tokenizer.model is gpt_4o_mini
+
+        stats = tokenizer.tokens_stats(
+            prompt="You are a helpful assistant.",
+            context_messages=["first message", "second message"],
+            user_message="What is the capital of France?",
+            ai_response="Paris.",
+        )
+
+        prompt_tokens = tokenizer.num_of_tokens("You are a helpful assistant.")
+        response_tokens = tokenizer.num_of_tokens("Paris.")
+        assert stats.prompt_tokens == prompt_tokens
+        assert stats.context_tokens == tokenizer.num_of_tokens("first messagesecond message")
+        assert stats.input_tokens == tokenizer.num_of_tokens("What is the capital of France?")
+        assert stats.response_tokens == response_tokens
+        assert stats.prompt_cost == "{:.6f}".format(prompt_tokens * gpt_4o_mini.input_cost / 1000)
+        assert stats.response_cost == "{:.6f}".format(response_tokens * gpt_4o_mini.output_cost / 1000)
+
+    @pytest.mark.asyncio
+    async def test_tokens_stats_requires_init_for_slug(self, gpt_4o_mini):
+        tokenizer = TsTokenizer(OpenAIModelSlugEnum.GPT_4O_MINI)
+        with pytest.raises(ValueError):
+            tokenizer.tokens_stats(prompt="hello")
@@ -0,0 +1,52 @@
+import time
+
+from shared.utils.logger import TsLogger
+
+logger = TsLogger(__name__)
+
+
+class CircuitBreaker:
+    """
+    Per-service circuit breaker for inter-service requests.
+
+    After `fail_max` consecutive failures the breaker opens and requests fail fast for
+    `reset_timeout` seconds; then a single trial request is let through (half-open).
+    A success closes the breaker again, a failure re-opens it.
+    """
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, fail_max: int = 5, reset_timeout: float = 30):
+        self.name = name
+        self.fail_max = fail_max
+        self.reset_timeout = reset_timeout
+        self.state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+
+    def _set_state(self, state: str) -> None:
+        if state != self.state:
+            logger.warning(f"Circuit breaker for {self.name}: {self.state} -> {state}")
+            self.state = state
+
+    def allow_request(self) -> bool:
+        if self.state == self.CLOSED:
+            return True
+        # let one trial through per reset_timeout, also if a previous trial never reported back
+        now = time.monotonic()
+        if now - self._opened_at >= self.reset_timeout:
+            self._opened_at = now
+            self._set_state(self.HALF_OPEN)
+            return True
+        return False
+
+    def record_success(self) -> None:
+        self._failures = 0
+        self._set_state(self.CLOSED)
+
+    def record_failure(self) -> None:
+        self._failures += 1
+        if self.state == self.HALF_OPEN or self._failures >= self.fail_max:
+            self._opened_at = time.monotonic()
+            self._set_state(self.OPEN)
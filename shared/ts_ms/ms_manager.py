@@ -1,20 +1,34 @@
 import logging
 import os
-from datetime import datetime
-from typing import Optional, List
-from uuid import UUID
+from typing import Any, Callable, Optional, List
 
 import httpx
+import msgspec
+import orjson
 from fastapi import HTTPException
 from httpx import Response
 from pydantic import BaseModel
+from tenacity import AsyncRetrying, retry_if_exception_type, stop_after_attempt, wait_exponential_jitter
 
 from shared.config import shared_settings
 from shared.enums import MicroServiceName
+from shared.ts_ms.circuit_breaker import CircuitBreaker
 from shared.utils.logger import TsLogger
 
 logger = TsLogger(__name__)
 
+# Methods that are safe to resend after the request may have reached the service.
+IDEMPOTENT_METHODS = frozenset({"GET", "PUT", "DELETE"})
+RETRYABLE_STATUS_CODES = frozenset({502, 503, 504})
+# ~0.1s, 0.2s, 0.4s, ... capped at 2s; tenacity 9.1 takes the base as `initial`
+RETRY_WAIT = wait_exponential_jitter(initial=0.1, jitter=0.1, max=2.0)
+
+
+class _RetryableStatus(Exception):
+    def __init__(self, response: httpx.Response):
+        super().__init__(f"retryable status {response.status_code}")
+        self.response = response
+
 
 class MicroServiceInfo(BaseModel):
     name: MicroServiceName
@@ -24,69 +38,90 @@ class MicroServiceInfo(BaseModel):
     retries: Optional[int] = 3
     active: Optional[bool] = False
     create_async_user: Optional[bool] = False
+    # opt-in per service once its server speaks HTTP/2 (e.g. hypercorn)
+    http2_enabled: Optional[bool] = False
+
+
+# Static, so a url_prefix can be mapped back to its service without building any MicroServiceInfo.
+_SERVICE_URL_PREFIXES: dict[MicroServiceName, str] = {
+    MicroServiceName.CORE_SERVICE: "/core",
+    MicroServiceName.IDENTITY_SERVICE: "/auth",
+    MicroServiceName.SUBSCRIPTION_SERVICE: "/subscription",
+    MicroServiceName.COMMUNITY_SERVICE: "/community",
+    MicroServiceName.DOC_CHATTING_SERVICE: "/doc-chatting",
+    MicroServiceName.BIBLE_SERVICE: "/bible",
+    MicroServiceName.ASSESSMENTS_SERVICE: "/assessments",
+    MicroServiceName.NOTIFICATIONS_SERVICE: "/notifications",
+}
 
 
 class MsManager:
     _instance = None
-    _services = {
-        MicroServiceName.CORE_SERVICE.snake(): MicroServiceInfo(
+    # pooled clients per process (keyed by http2), reused across requests to keep connections alive
+    _clients: dict[bool, httpx.AsyncClient] = {}
+    # Each service's info is only built (and its settings read) the first time it is asked for.
+    _service_factories: dict[str, Callable[[], MicroServiceInfo]] = {
+        MicroServiceName.CORE_SERVICE.snake(): lambda: MicroServiceInfo(
             name=MicroServiceName.CORE_SERVICE,
-            url_prefix="/core",
+            url_prefix=_SERVICE_URL_PREFIXES[MicroServiceName.CORE_SERVICE],
             local_development_url=shared_settings.CORE_SERVICE_DEVELOPMENT_URL,
             active=shared_settings.CORE_SERVICE_ACTIVE,
             create_async_user= shared_settings.CORE_SERVICE_ACTIVE
         ),
-        MicroServiceName.IDENTITY_SERVICE.snake(): MicroServiceInfo(
+        MicroServiceName.IDENTITY_SERVICE.snake(): lambda: MicroServiceInfo(
             name=MicroServiceName.IDENTITY_SERVICE,
-            url_prefix="/auth",
+            url_prefix=_SERVICE_URL_PREFIXES[MicroServiceName.IDENTITY_SERVICE],
             local_development_url=shared_settings.IDENTITY_SERVICE_DEVELOPMENT_URL,
             active=shared_settings.IDENTITY_SERVICE_ACTIVE,
             create_async_user=shared_settings.IDENTITY_SERVICE_CREATE_ASYNC_USER
         ),
-        MicroServiceName.SUBSCRIPTION_SERVICE.snake(): MicroServiceInfo(
+        MicroServiceName.SUBSCRIPTION_SERVICE.snake(): lambda: MicroServiceInfo(
             name=MicroServiceName.SUBSCRIPTION_SERVICE,
-            url_prefix="/subscription",
+            url_prefix=_SERVICE_URL_PREFIXES[MicroServiceName.SUBSCRIPTION_SERVICE],
             local_development_url=shared_settings.SUBSCRIPTION_SERVICE_DEVELOPMENT_URL,
             active=shared_settings.SUBSCRIPTION_SERVICE_ACTIVE,
             create_async_user=shared_settings.SUBSCRIPTION_SERVICE_CREATE_ASYNC_USER
         ),
-        MicroServiceName.COMMUNITY_SERVICE.snake(): MicroServiceInfo(
+        MicroServiceName.COMMUNITY_SERVICE.snake(): lambda: MicroServiceInfo(
             name=MicroServiceName.COMMUNITY_SERVICE,
-            url_prefix="/community",
+            url_prefix=_SERVICE_URL_PREFIXES[MicroServiceName.COMMUNITY_SERVICE],
             local_development_url=shared_settings.COMMUNITY_SERVICE_DEVELOPMENT_URL,
             active=shared_settings.COMMUNITY_SERVICE_ACTIVE,
             create_async_user=shared_settings.COMMUNITY_SERVICE_CREATE_ASYNC_USER
         ),
-        MicroServiceName.DOC_CHATTING_SERVICE.snake(): MicroServiceInfo(
+        MicroServiceName.DOC_CHATTING_SERVICE.snake(): lambda: MicroServiceInfo(
             name=MicroServiceName.DOC_CHATTING_SERVICE,
-            url_prefix="/doc-chatting",
+            url_prefix=_SERVICE_URL_PREFIXES[MicroServiceName.DOC_CHATTING_SERVICE],
             local_development_url=shared_settings.DOC_CHATTING_SERVICE_DEVELOPMENT_URL,
             active=shared_settings.DOC_CHATTING_SERVICE_ACTIVE,
             create_async_user=shared_settings.DOC_CHATTING_SERVICE_CREATE_ASYNC_USER
         ),
-        MicroServiceName.BIBLE_SERVICE.snake(): MicroServiceInfo(
+        MicroServiceName.BIBLE_SERVICE.snake(): lambda: MicroServiceInfo(
             name=MicroServiceName.BIBLE_SERVICE,
-            url_prefix="/bible",
+            url_prefix=_SERVICE_URL_PREFIXES[MicroServiceName.BIBLE_SERVICE],
             local_development_url=shared_settings.BIBLE_SERVICE_DEVELOPMENT_URL,
             active=shared_settings.BIBLE_SERVICE_ACTIVE,
             create_async_user= shared_settings.BIBLE_SERVICE_CREATE_ASYNC_USER
         ),
-        MicroServiceName.ASSESSMENTS_SERVICE.snake(): MicroServiceInfo(
+        MicroServiceName.ASSESSMENTS_SERVICE.snake(): lambda: MicroServiceInfo(
             name=MicroServiceName.ASSESSMENTS_SERVICE,
-            url_prefix="/assessments",
+            url_prefix=_SERVICE_URL_PREFIXES[MicroServiceName.ASSESSMENTS_SERVICE],
             local_development_url=shared_settings.ASSESSMENTS_SERVICE_DEVELOPMENT_URL,
             active=shared_settings.ASSESSMENTS_SERVICE_ACTIVE,
             create_async_user=shared_settings.ASSESSMENTS_SERVICE_CREATE_ASYNC_USER
 
         ),
-        MicroServiceName.NOTIFICATIONS_SERVICE.snake(): MicroServiceInfo(
+        MicroServiceName.NOTIFICATIONS_SERVICE.snake(): lambda: MicroServiceInfo(
             name=MicroServiceName.NOTIFICATIONS_SERVICE,
-            url_prefix="/notifications",
+            url_prefix=_SERVICE_URL_PREFIXES[MicroServiceName.NOTIFICATIONS_SERVICE],
             local_development_url=shared_settings.NOTIFICATIONS_SERVICE_DEVELOPMENT_URL,
             active=shared_settings.NOTIFICATIONS_SERVICE_ACTIVE,
             create_async_user=shared_settings.NOTIFICATIONS_SERVICE_CREATE_ASYNC_USER
         ),
     }
+    _service_cache: dict[str, MicroServiceInfo] = {}
+    _breakers: dict[str, CircuitBreaker] = {}
+    _prefix_to_name: dict[str, str] = {prefix: name.snake() for name, prefix in _SERVICE_URL_PREFIXES.items()}
 
     def __new__(cls):
         if cls._instance is None:
@@ -103,27 +138,58 @@ class MsManager:
         self._initialized = True
 
     @staticmethod
-    def serialize_json(data):
+    def _json_default(obj):
+        """
+        Fallback for types orjson does not serialize natively (UUID/datetime are native).
+        """
+        if hasattr(obj, "model_dump"):
+            return obj.model_dump(mode="json")
+        return str(obj)
+
+    @classmethod
+    async def _get_client(cls, http2: bool = False) -> httpx.AsyncClient:
+        client = cls._clients.get(http2)
+        if client is None or client.is_closed:
+            client = httpx.AsyncClient(
+                timeout=httpx.Timeout(30.0),
+                limits=httpx.Limits(max_connections=200, max_keepalive_connections=50, keepalive_expiry=30),
+                http2=http2,
+                # no Connection header: the pool keeps connections alive, and h2 rejects
+                # connection-specific headers on HTTP/2 requests
+                headers={"Accept-Encoding": "gzip, deflate"},
+            )
+            cls._clients[http2] = client
+        return client
+
+    @classmethod
+    async def close(cls):
         """
-        Recursively convert UUIDs and datetime objects to serializable forms.
+        Close the shared HTTP clients; call on application shutdown.
         """
-        if isinstance(data, dict):
-            return {k: MsManager.serialize_json(v) for k, v in data.items()}
-        elif isinstance(data, list):
-            return [MsManager.serialize_json(i) for i in data]
-        elif isinstance(data, UUID):
-            return str(data)
-        elif isinstance(data, datetime):
-            return data.isoformat()
-        return data
+        clients, cls._clients = cls._clients, {}
+        for client in clients.values():
+            await client.aclose()
+
+    @classmethod
+    def _get_breaker(cls, service_name: str) -> CircuitBreaker:
+        breaker = cls._breakers.get(service_name)
+        if breaker is None:
+            breaker = cls._breakers[service_name] = CircuitBreaker(service_name)
+        return breaker
 
     @classmethod
     def get_service(cls, service_name: str) -> Optional[MicroServiceInfo]:
-        return cls._services.get(service_name, None)
+        service_info = cls._service_cache.get(service_name)
+        if service_info is None:
+            factory = cls._service_factories.get(service_name)
+            if factory is None:
+                return None
+            service_info = cls._service_cache[service_name] = factory()
+        return service_info
 
     @classmethod
     def get_services(cls) -> dict[str, MicroServiceInfo]:
-        return cls._services
+        return {service_name: cls.get_service(service_name) for service_name in cls._service_factories}
 
     @classmethod
     def get_service_url_prefix(cls, service_name: str) -> str:
@@ -132,10 +198,7 @@ class MsManager:
 
     @classmethod
     def get_service_name(cls, service_prefix: str) -> str:
-        for service_name, service_info in cls._services.items():
-            if service_info.url_prefix == service_prefix:
-                return service_name
-        return ""
+        return cls._prefix_to_name.get(service_prefix, "")
 
     @classmethod
     def get_internal_service_domainname(cls, service_name: str) -> str:
@@ -152,10 +215,13 @@ class MsManager:
             base_error_message: str = "Error",
             params: Optional[dict] = None,
             json: Optional[dict] = None,
-            headers: Optional[dict] = None
-    ) -> httpx.Response:
+            headers: Optional[dict] = None,
+            response_model: Optional[type] = None
+    ) -> httpx.Response | Any:
         """
         Makes an HTTP request to a specific microservice with the given method and data.
+        If `response_model` (a msgspec type, e.g. a `msgspec.Struct` or a `list` of them) is given,
+        the body is decoded and validated into it instead of returning the raw response.
         """
         service_info = cls.get_service(service_name)
         if not service_info:
@@ -180,72 +246,117 @@ class MsManager:
         else:
             url = f"http://{domain_name}{endpoint}"
 
+        content = None
         if json is not None:
-            json = cls.serialize_json(json)  # Apply UUID serialization
-
-        # Set a custom timeout (for example, 30 seconds)
-        timeout = httpx.Timeout(30.0)
+            content = orjson.dumps(json, default=cls._json_default, option=orjson.OPT_NON_STR_KEYS)
+            headers = {**headers, "Content-Type": "application/json"}
+
+        breaker = cls._get_breaker(service_name)
+        if not breaker.allow_request():
+            raise HTTPException(status_code=503, detail=f"{base_error_message}: service unavailable")
+
+        # Connection failures never reached the service, so every method may retry them;
+        # gateway errors are only retried when resending is harmless. Read timeouts are
+        # never retried: a hung service would hold the caller for retries x timeout
+        # before the breaker has seen enough failures to open.
+        idempotent = method.upper() in IDEMPOTENT_METHODS
+        retryable = (httpx.ConnectError, httpx.ConnectTimeout)
+        if idempotent:
+            retryable += (_RetryableStatus,)
+
+        client = await cls._get_client(http2=bool(service_info.http2_enabled))
+        try:
+            async for attempt in AsyncRetrying(
+                    stop=stop_after_attempt(max(service_info.retries or 1, 1)),
+                    wait=RETRY_WAIT,
+                    retry=retry_if_exception_type(retryable),
+                    reraise=True,
+            ):
+                with attempt:
+                    response = await client.request(
+                        method=method,
+                        url=url,
+                        headers=headers,
+                        params=params,
+                        content=content,
+                    )
+                    if idempotent and response.status_code in RETRYABLE_STATUS_CODES:
+                        raise _RetryableStatus(response)
+        except _RetryableStatus as exc:
+            response = exc.response
+        except httpx.ReadTimeout as exc:
+            breaker.record_failure()
+            logger.error(f"Timeout error for {url}: {exc}")
+            # Raise an HTTPException with a 504 Gateway Timeout status code
+            raise HTTPException(
+                status_code=504,
+                detail=f"{base_error_message}: request timed out"
+            ) from exc
+        except httpx.TransportError as exc:
+            breaker.record_failure()
+            logger.error(f"Connection error for {url}: {exc}")
+            raise HTTPException(
+                status_code=503,
+                detail=f"{base_error_message}: service unreachable"
+            ) from exc
+
+        if response.status_code >= 500:
+            breaker.record_failure()
+        else:
+            breaker.record_success()
 
-        async with httpx.AsyncClient(timeout=timeout) as client:
+        # Consider any 2xx status code as successful
+        if not (200 <= response.status_code < 300):
+            try:
+                # Attempt to parse JSON, or fallback to text if there's no content
+                response_text = response.json() if response.content else response.text
+            except Exception:
+                response_text = response.text
+
+            if isinstance(response_text, dict) and "detail" in response_text:
+                response_text = response_text.get("detail")
+            logger.error(f"Error from {url}: {response_text}")
+            raise HTTPException(
+                status_code=response.status_code,
+                detail=f"{base_error_message}: {response_text}"
+            )
+
+        if response_model is not None:
             try:
-                response = await client.request(
-                    method=method,
-                    url=url,
-                    headers=headers,
-                    params=params,
-                    json=json,
-                )
-            except httpx.ReadTimeout as exc:
-                logger.error(f"Timeout error for {url}: {exc}")
-                # Raise an HTTPException with a 504 Gateway Timeout status code
+                return msgspec.json.decode(response.content, type=response_model)
+            except msgspec.DecodeError as exc:
+                logger.error(f"Invalid response from {url}: {exc}")
                 raise HTTPException(
-                    status_code=504,
-                    detail=f"{base_error_message}: request timed out"
+                    status_code=502,
+                    detail=f"{base_error_message}: invalid response"
                 ) from exc
-
-            # Consider any 2xx status code as successful
-            if not (200 <= response.status_code < 300):
-                try:
-                    # Attempt to parse JSON, or fallback to text if there's no content
-                    response_text = response.json() if response.content else response.text
-                except Exception:
-                    response_text = response.text
-
-                if isinstance(response_text, dict) and "detail" in response_text:
-                    response_text = response_text.get("detail")
-                logger.error(f"Error from {url}: {response_text}")
-                raise HTTPException(
-                    status_code=response.status_code,
-                    detail=f"{base_error_message}: {response_text}"
-                )
-
         return response
 
     @classmethod
     async def get(cls, endpoint: str, base_error_message: str, service_name: Optional[str] = None,
-                  params: Optional[dict] = None) -> Response:
+                  params: Optional[dict] = None, response_model: Optional[type] = None) -> Response | Any:
         return await cls.make_request("GET", service_name, endpoint, base_error_message=base_error_message,
-                                      params=params)
+                                      params=params, response_model=response_model)
 
     @classmethod
     async def post(cls, endpoint: str, base_error_message: str, service_name: Optional[str] = None,
                    json: Optional[dict] = None, params: Optional[dict] = None,
-                   headers: Optional[dict] = None) -> Response:
+                   headers: Optional[dict] = None, response_model: Optional[type] = None) -> Response | Any:
         return await cls.make_request("POST", service_name, endpoint, base_error_message=base_error_message, json=json,
-                                      params=params, headers=headers)
+                                      params=params, headers=headers, response_model=response_model)
 
     @classmethod
     async def put(cls, endpoint: str, base_error_message: str, service_name: Optional[str] = None,
                   json: Optional[dict] = None, params: Optional[dict] = None,
-                  headers: Optional[dict] = None) -> Response:
+                  headers: Optional[dict] = None, response_model: Optional[type] = None) -> Response | Any:
         return await cls.make_request("PUT", service_name, endpoint, base_error_message=base_error_message, json=json,
-                                      params=params, headers=headers)
+                                      params=params, headers=headers, response_model=response_model)
 
     @classmethod
     async def delete(cls, endpoint: str, base_error_message: str, service_name: Optional[str] = None,
-                     params: Optional[dict] = None) -> Response:
+                     params: Optional[dict] = None, response_model: Optional[type] = None) -> Response | Any:
         return await cls.make_request("DELETE", service_name, endpoint, base_error_message=base_error_message,
-                                      params=params)
+                                      params=params, response_model=response_model)
 
     @classmethod
     def get_login_url(cls) -> Optional[str]:
@@ -1,3 +1,4 @@
+import functools
 from typing import List
 
 import tiktoken
@@ -12,36 +13,51 @@ from core_service.services.open_ai_model import OpenAIModelService
 # from utils.errors import log_error
 
 
+@functools.lru_cache(maxsize=8)
+def _get_encoding(model_name: str) -> tiktoken.Encoding:
+    """
+    Load the BPE vocab for `model_name` once per process.
+    """
+    return tiktoken.encoding_for_model(model_name)
+
+
 class TsTokenizer:
 
-    def __init__(self, model: OpenAIModelSlugEnum | OpenAIModel):
+    def __init__(self, model: OpenAIModelSlugEnum | OpenAIModel, db: AsyncSession | None = None):
         """
         Initialize tokenizer with provided or default OpenAI model.
+        A slug only selects the encoding; `await init()` resolves it to its OpenAIModel
+        row, whose costs `tokens_stats` needs.
 
         :param model: Slug of OpenAI model or OpenAIModel instance
-        :raise ValueError: If provided model is not found
+        :param db: Session used by `init` to look the slug up
         """
         # TODO: fix to encode all models, now its GPT4o by default
-        self.model = None
+        self.slug = model if isinstance(model, OpenAIModelSlugEnum) else None
+        self.model: OpenAIModel | None = None if self.slug is not None else model
+        self.db = db
 
-        encoding = self.model.name  # Use provided model
+        encoding = model.value if self.slug is not None else model.name  # Use provided model
         try:
-            self.encoding = tiktoken.encoding_for_model(encoding)
+            self.encoding = _get_encoding(encoding)
         except KeyError as e:
             self.encoding = None
 
-    async def init(self):
-        gpt_4o_mini_model = await OpenAIModelService().get_model_by_slug(
-            model_slug=OpenAIModelSlugEnum.GPT_4O_MINI,
-            db=self.db,
-        )
-        if gpt_4o_mini_model is None:
-            raise ValueError("GPT-4O-Mini model not found.")
+    async def init(self) -> "TsTokenizer":
+        """
+        Resolve the slug to its OpenAIModel row.
 
+        :raise ValueError: If the model is not found
+        """
+        if self.model is None:
+            self.model = await OpenAIModelService().get_model_by_slug(model_slug=self.slug, db=self.db)
+            if self.model is None:
+                raise ValueError(f"OpenAI model {self.slug.value} not found.")
+        return self
 
     def num_of_tokens(self, text: str) -> int | None:
         if self.encoding:
-            return len(self.encoding.encode(text))
+            return len(self.encoding.encode_ordinary(text))
         else:
             return None
 
@@ -55,15 +71,13 @@ class TsTokenizer:
         stats = TokenStats()
         if self.encoding is None:
             return stats
+        if self.model is None:
+            raise ValueError("TsTokenizer created from a slug must be awaited with init() before tokens_stats().")
 
-        # Token counts
-        stats.prompt_tokens = len(self.encoding.encode(prompt))
-        context_text = ''
-        for message in context_messages:
-            context_text += str(message)
-        stats.context_tokens = len(self.encoding.encode(context_text))
-        stats.input_tokens = len(self.encoding.encode(user_message))
-        stats.response_tokens = len(self.encoding.encode(ai_response))
+        # Token counts; ordinary encoding skips the special-token scan
+        texts = [prompt, "".join(map(str, context_messages or [])), user_message, ai_response]
+        counts = [len(self.encoding.encode_ordinary(text)) for text in texts]
+        stats.prompt_tokens, stats.context_tokens, stats.input_tokens, stats.response_tokens = counts
 
         # Calculating costs
         # Token counts
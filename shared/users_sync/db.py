@@ -1,9 +1,9 @@
 import os
 import uuid
 
-from sqlalchemy import Column, String, Boolean, DateTime, Enum, Integer, ARRAY, func
+from sqlalchemy import Column, String, Boolean, DateTime, Enum, Integer, BigInteger, ARRAY, Index, func, text
 from sqlalchemy.dialects.postgresql import UUID as PGUUID
-from sqlalchemy.orm import relationship
+from sqlalchemy.orm import relationship, validates
 
 from shared.users_sync import Base
 from shared.enums import UserGender, UserRole, MicroServiceName
@@ -14,7 +14,30 @@ This model should not be included for the identity service.
 This model is used among other services to link users with their accounts.
 """
 
-current_microservice_name = os.environ["CURRENT_MICRO_SERVICE_NAME"]
+# resolved once at import; the services and the User relationships below are keyed by it
+current_microservice_name = MicroServiceName(os.environ["CURRENT_MICRO_SERVICE_NAME"])
+
+# Bit of each role in User.roles_bits. Stored data depends on these positions:
+# give new roles the next free bit and never renumber existing ones.
+ROLE_BITS = {
+    UserRole.SUBSCRIBER: 1 << 0,
+    UserRole.MODERATOR: 1 << 1,
+    UserRole.TESTER: 1 << 2,
+    UserRole.ADMIN: 1 << 3,
+    UserRole.CONTENT_MANAGER: 1 << 4,
+    UserRole.TEAM_MEMBER: 1 << 5,
+}
+
+
+def roles_to_bits(roles) -> int:
+    """
+    Pack UserRole members (or their values) into a roles_bits mask.
+    """
+    bits = 0
+    for role in roles or ():
+        bits |= ROLE_BITS[UserRole(role)]
+    return bits
+
 
 class User(Base):
     __tablename__ = "users"
@@ -34,39 +57,95 @@ class User(Base):
     is_deleted = Column(Boolean, nullable=False, default=False)
 
     # Roles field as an array of UserRole enum
-    roles = Column(ARRAY(Enum(UserRole)), nullable=False, default=[UserRole.SUBSCRIBER])
-
-    # Relationships
-    if current_microservice_name == MicroServiceName.CORE_SERVICE:
-        subscription = relationship("UserSubscription", uselist=False, back_populates="user", lazy='selectin')
-        threads = relationship("Thread", back_populates="user", lazy='selectin')
-        api_requests = relationship("APIRequest", back_populates="user", lazy='selectin')
-        thread_folders = relationship("ThreadFolder", back_populates="user", lazy='selectin')
-        feature_usages = relationship("FeatureUsage", back_populates="user", lazy='selectin')
-        audio_transcriptions = relationship("AudioTranscription", back_populates="user", lazy='selectin')
-    elif current_microservice_name == MicroServiceName.SUBSCRIPTION_SERVICE:
-        subscriptions = relationship("Subscription", back_populates="user")
-        card_details = relationship("CardDetails", back_populates="user")
-        checkouts = relationship("Checkout", back_populates="user")
-        transactions = relationship("Transaction", back_populates="user")
-        coupon_usages = relationship("CouponUsage", back_populates="user", lazy="selectin")
-        payment_response = relationship("PaymentResponseModel", back_populates="user", uselist=True)
-        cancellation_transactions = relationship("CancellationTransaction", back_populates="user", lazy="selectin")
-    elif current_microservice_name == MicroServiceName.COMMUNITY_SERVICE:
-        posts = relationship("Post", back_populates="user", lazy='selectin')
-        comments = relationship("Comment", back_populates="user", lazy='selectin')
-        replies = relationship("Reply", back_populates="user", lazy='selectin')
-        invitations = relationship("PostInvitation", back_populates="user", lazy='selectin')
-        approval_requests = relationship("PostApprovalRequest", back_populates="user", lazy='selectin', cascade="all, delete-orphan")
-        activities = relationship("Activity", back_populates="user", lazy='selectin')
-        notifications = relationship("Notification", back_populates="user", lazy='selectin')
-    elif current_microservice_name == MicroServiceName.DOC_CHATTING_SERVICE:
-            documents = relationship("Document", back_populates="user", lazy="selectin")
-    elif current_microservice_name == MicroServiceName.BIBLE_SERVICE:
-        pass
-    elif current_microservice_name == MicroServiceName.ASSESSMENTS_SERVICE:
-        assessment_sessions = relationship("UserSession", back_populates="user")
-    elif current_microservice_name == MicroServiceName.NOTIFICATIONS_SERVICE:
-        notifications = relationship("Notification", back_populates="user")
-        devices = relationship("UserDevice", back_populates="user", cascade="all, delete-orphan")
+    # values_callable: labels are the enum values (identical to the names here), so plain
+    # value strings bind directly, e.g. in bulk inserts
+    roles = Column(
+        ARRAY(Enum(UserRole, values_callable=lambda e: [x.value for x in e])),
+        nullable=False,
+        default=[UserRole.SUBSCRIBER]
+    )
+    # roles packed into a bitmask, kept in step with `roles` on every write, so
+    # "has role X" is a single integer test the planner can serve from an index.
+    # Each service adds it with shared.users_sync.migrations.upgrade_roles_bits.
+    roles_bits = Column(
+        BigInteger,
+        nullable=False,
+        default=ROLE_BITS[UserRole.SUBSCRIBER],
+        server_default=text(str(ROLE_BITS[UserRole.SUBSCRIBER]))
+    )
+
+    # account_id, account_id_hash and email are already indexed through their unique constraints.
+    # fetch server-generated values (updated_at's onupdate) via RETURNING during the flush,
+    # so committed instances stay fully loaded without a refresh round-trip
+    __mapper_args__ = {"eager_defaults": True}
+
+    __table_args__ = (
+        # partial index: list queries only ever look at live users
+        Index('ix_users_active', 'is_deleted', postgresql_where=text('is_deleted = false')),
+        # for ad-hoc case-insensitive email queries; not unique, since case-variant
+        # duplicates may exist, so get_user_by_email keeps matching exactly
+        Index('ix_users_email_lower', func.lower(email)),
+        # admin lookups (has_role_clause(UserRole.ADMIN))
+        Index('ix_users_admin', 'account_id', postgresql_where=text(f'(roles_bits & {ROLE_BITS[UserRole.ADMIN]}) <> 0')),
+    )
+
+    @validates('roles')
+    def _sync_roles_bits(self, key, roles):
+        self.roles_bits = roles_to_bits(roles)
+        return roles
+
+    def has_role(self, role: UserRole) -> bool:
+        # roles_bits is backfilled by shared.users_sync.migrations.upgrade_roles_bits and
+        # kept in step with `roles` on every write; it is unset only before the first flush
+        return bool((self.roles_bits or 0) & ROLE_BITS[role])
+
+    @classmethod
+    def has_role_clause(cls, role: UserRole):
+        # SQL counterpart of has_role, for WHERE clauses
+        return cls.roles_bits.op('&')(ROLE_BITS[role]) != 0
+
+
+# Service-specific relationships of User, keyed by the service that owns the related models.
+# Built lazily so only the current service's relationship() objects are ever constructed.
+_RELATIONSHIPS = {
+    MicroServiceName.CORE_SERVICE: lambda: {
+        "subscription": relationship("UserSubscription", uselist=False, back_populates="user", lazy='selectin'),
+        "threads": relationship("Thread", back_populates="user", lazy='selectin'),
+        "api_requests": relationship("APIRequest", back_populates="user", lazy='selectin'),
+        "thread_folders": relationship("ThreadFolder", back_populates="user", lazy='selectin'),
+        "feature_usages": relationship("FeatureUsage", back_populates="user", lazy='selectin'),
+        "audio_transcriptions": relationship("AudioTranscription", back_populates="user", lazy='selectin'),
+    },
+    MicroServiceName.SUBSCRIPTION_SERVICE: lambda: {
+        "subscriptions": relationship("Subscription", back_populates="user"),
+        "card_details": relationship("CardDetails", back_populates="user"),
+        "checkouts": relationship("Checkout", back_populates="user"),
+        "transactions": relationship("Transaction", back_populates="user"),
+        "coupon_usages": relationship("CouponUsage", back_populates="user", lazy="selectin"),
+        "payment_response": relationship("PaymentResponseModel", back_populates="user", uselist=True),
+        "cancellation_transactions": relationship("CancellationTransaction", back_populates="user", lazy="selectin"),
+    },
+    MicroServiceName.COMMUNITY_SERVICE: lambda: {
+        "posts": relationship("Post", back_populates="user", lazy='selectin'),
+        "comments": relationship("Comment", back_populates="user", lazy='selectin'),
+        "replies": relationship("Reply", back_populates="user", lazy='selectin'),
+        "invitations": relationship("PostInvitation", back_populates="user", lazy='selectin'),
+        "approval_requests": relationship("PostApprovalRequest", back_populates="user", lazy='selectin', cascade="all, delete-orphan"),
+        "activities": relationship("Activity", back_populates="user", lazy='selectin'),
+        "notifications": relationship("Notification", back_populates="user", lazy='selectin'),
+    },
+    MicroServiceName.DOC_CHATTING_SERVICE: lambda: {
+        "documents": relationship("Document", back_populates="user", lazy="selectin"),
+    },
+    MicroServiceName.ASSESSMENTS_SERVICE: lambda: {
+        "assessment_sessions": relationship("UserSession", back_populates="user"),
+    },
+    MicroServiceName.NOTIFICATIONS_SERVICE: lambda: {
+        "notifications": relationship("Notification", back_populates="user"),
+        "devices": relationship("UserDevice", back_populates="user", cascade="all, delete-orphan"),
+    },
+}
 
+# declarative classes map attributes assigned after the class body like ones declared in it
+for _name, _rel in _RELATIONSHIPS.get(current_microservice_name, dict)().items():
+    setattr(User, _name, _rel)
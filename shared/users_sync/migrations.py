@@ -0,0 +1,77 @@
+"""
+Schema changes to the shared `users` table, for the Alembic revisions of the services
+that include shared.users_sync.db.User. Call them from a revision of each service:
+
+    from shared.users_sync.migrations import (
+        downgrade_roles_bits, downgrade_users_indexes, upgrade_roles_bits, upgrade_users_indexes,
+    )
+
+    def upgrade() -> None:
+        upgrade_roles_bits(op)
+        upgrade_users_indexes(op)
+
+    def downgrade() -> None:
+        downgrade_users_indexes(op)
+        downgrade_roles_bits(op)
+"""
+import sqlalchemy as sa
+
+from shared.enums import UserRole
+from shared.users_sync.db import ROLE_BITS
+
+_ADMIN_PREDICATE = f'(roles_bits & {ROLE_BITS[UserRole.ADMIN]}) <> 0'
+
+
+def _roles_bits_backfill_sql() -> str:
+    cases = " ".join(f"WHEN '{role.value}' THEN {bit}" for role, bit in ROLE_BITS.items())
+    return (
+        "UPDATE users SET roles_bits = "
+        f"(SELECT coalesce(bit_or(CASE r {cases} ELSE 0 END), 0) FROM unnest(roles::text[]) AS r)"
+    )
+
+
+def upgrade_roles_bits(op) -> None:
+    """
+    Add users.roles_bits, fill it from the existing `roles` arrays, then make it NOT NULL
+    and index admins. The column is nullable until the backfill has run, so no row is ever
+    visible with a default mask that disagrees with its roles.
+    """
+    op.add_column('users', sa.Column('roles_bits', sa.BigInteger(), nullable=True))
+    op.execute(_roles_bits_backfill_sql())
+    op.alter_column(
+        'users', 'roles_bits',
+        nullable=False,
+        server_default=sa.text(str(ROLE_BITS[UserRole.SUBSCRIBER]))
+    )
+    op.create_index('ix_users_admin', 'users', ['account_id'], postgresql_where=sa.text(_ADMIN_PREDICATE))
+
+
+def downgrade_roles_bits(op) -> None:
+    op.drop_index('ix_users_admin', table_name='users')
+    op.drop_column('users', 'roles_bits')
+
+
+def upgrade_users_indexes(op) -> None:
+    """
+    Create ix_users_active and ix_users_email_lower. They are built CONCURRENTLY so the
+    live users table is not write-locked while they build; Postgres refuses that inside a
+    transaction, hence the autocommit block.
+    """
+    with op.get_context().autocommit_block():
+        op.create_index(
+            'ix_users_active', 'users', ['is_deleted'],
+            postgresql_where=sa.text('is_deleted = false'),
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        op.create_index(
+            'ix_users_email_lower', 'users', [sa.text('lower(email)')],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade_users_indexes(op) -> None:
+    with op.get_context().autocommit_block():
+        op.drop_index('ix_users_email_lower', table_name='users', postgresql_concurrently=True, if_exists=True)
+        op.drop_index('ix_users_active', table_name='users', postgresql_concurrently=True, if_exists=True)
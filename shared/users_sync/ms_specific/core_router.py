@@ -1,12 +1,10 @@
 import uuid
 
 from fastapi import HTTPException
-import traceback
 from shared.schemas.core.user import UserSubscriptionRead, UserSubscriptionUpdate
 from shared.users_sync import SessionDep
-from shared.users_sync.ms_specific.core_service import update_user_subscription
+from shared.users_sync.ms_specific.core_service import load_user_sub_plan, update_user_subscription
 from shared.users_sync.router import user_sync_router
-from shared.users_sync.service import get_user
 from shared.utils.logger import TsLogger
 logger = TsLogger(name=__name__)
 
@@ -19,18 +17,19 @@ async def update_account_subscription(
 ) -> UserSubscriptionRead:
     try:
 
-        user = await get_user(db, account_id)
-        if user is None:
+        user_sub_plan = await load_user_sub_plan(db, account_id, subscription_update.plan_id)
+        if user_sub_plan is None:
             raise HTTPException(status_code=404, detail="User not found")
+        _, subscription, plan = user_sub_plan
 
-        updated_subscription = await update_user_subscription(user, subscription_update, db)
+        updated_subscription = await update_user_subscription(subscription, plan, subscription_update, db)
         if updated_subscription is None:
             raise HTTPException(status_code=404, detail="Subscription not found or not active Testing")
         return UserSubscriptionRead.model_validate(updated_subscription)
     except HTTPException as e:
-        traceback.print_exc()
+        logger.error("subscription update failed", exception=e)
         raise e
     except Exception as e:
-        traceback.print_exc()
+        logger.error("subscription update failed", exception=e, exc_info=True)
         raise HTTPException(status_code=500, detail=str(e))
 
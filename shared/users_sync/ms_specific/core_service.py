@@ -12,28 +12,36 @@ from shared.utils.logger import TsLogger
 
 logger = TsLogger(name=__name__)
 
+# Points granted per billing period, as a multiple of the plan's monthly points
+_DURATION_POINT_MULT = {
+    SubscriptionPlanEnum.MONTHLY.value: 1,
+    SubscriptionPlanEnum.ANNUAL.value: 12,
+}
+
 if "CURRENT_MICRO_SERVICE_NAME" not in os.environ:
     raise ValueError("CURRENT_MICRO_SERVICE_NAME environment variable is not set")
 
 if os.environ['CURRENT_MICRO_SERVICE_NAME'] == MicroServiceName.CORE_SERVICE:
     from uuid import UUID
 
-    from sqlalchemy import select
+    from sqlalchemy import bindparam, select
     from sqlalchemy.ext.asyncio import AsyncSession
+    from sqlalchemy.orm import lazyload
 
     from shared.users_sync.db import User
     from core_service.DB import UserSubscription, Plan
 
+    # built once; calls only bind parameters
+    _STMT_SUBSCRIPTION_BY_USER = select(UserSubscription).where(UserSubscription.user_id == bindparam('user_id'))
+    _STMT_PLAN_BY_NAME = select(Plan).where(Plan.name == bindparam('name'))
 
     async def get_user_subscription(db: AsyncSession, user_id: UUID) -> UserSubscription | None:
-        stmt = select(UserSubscription).where(UserSubscription.user_id == user_id)
-        result = await db.execute(stmt)
+        result = await db.execute(_STMT_SUBSCRIPTION_BY_USER, {'user_id': user_id})
         return result.scalar_one_or_none()
 
 
     async def create_user_subscription(new_user: User, db: AsyncSession) -> UserSubscription:
-        stmt = select(Plan).where(Plan.name == PlatformPlans.FREE)
-        result = await db.execute(stmt)
+        result = await db.execute(_STMT_PLAN_BY_NAME, {'name': PlatformPlans.FREE})
         plan = result.scalar_one_or_none()
 
         subscription = UserSubscription(
@@ -49,19 +57,35 @@ if os.environ['CURRENT_MICRO_SERVICE_NAME'] == MicroServiceName.CORE_SERVICE:
         return subscription
 
 
+    async def load_user_sub_plan(
+            db: AsyncSession,
+            account_id: UUID,
+            plan_id: UUID
+    ) -> tuple[User, UserSubscription | None, Plan | None] | None:
+        """
+        Fetch the user, their subscription and the requested plan in one round-trip.
+        Returns None if the account does not exist; the subscription / plan slots are
+        None when missing.
+        """
+        stmt = (
+            select(User, UserSubscription, Plan)
+            .outerjoin(UserSubscription, UserSubscription.user_id == User.user_id)
+            .outerjoin(Plan, Plan.plan_id == plan_id)
+            .where(User.account_id == account_id)
+            # only the three rows are needed; skip the selectin relationship loads
+            .options(lazyload("*"))
+        )
+        result = await db.execute(stmt)
+        row = result.one_or_none()
+        return tuple(row) if row is not None else None
+
+
     async def update_user_subscription(
-            user: User,
+            subscription: UserSubscription | None,
+            plan: Plan | None,
             subscription_update: UserSubscriptionUpdate,
             db: AsyncSession
     ) -> UserSubscription | None:
-        stmt = select(UserSubscription).where(UserSubscription.user_id == user.user_id)
-        subscription_query = await db.execute(stmt)
-        subscription = subscription_query.scalar_one_or_none()
-
-
-        stmt_plan = select(Plan).where(subscription_update.plan_id == Plan.plan_id)
-        result_plan = await db.execute(stmt_plan)
-        plan = result_plan.scalars().first()
         if not plan:
             raise HTTPException(status_code=404, detail="This Plan Not Exist In Core MS Tables")
 
@@ -69,13 +93,12 @@ if os.environ['CURRENT_MICRO_SERVICE_NAME'] == MicroServiceName.CORE_SERVICE:
             subscription.plan_id = plan.plan_id
             subscription.subscription_start = subscription_update.subscription_start
             subscription.subscription_end = subscription_update.subscription_end
-            if subscription_update.subscription_duration == SubscriptionPlanEnum.MONTHLY.value:
-                subscription.points_balance = plan.points
-            elif subscription_update.subscription_duration == SubscriptionPlanEnum.ANNUAL.value:
-                subscription.points_balance = plan.points * 12
-            else:
+            try:
+                multiplier = _DURATION_POINT_MULT[subscription_update.subscription_duration]
+            except KeyError:
                 raise HTTPException(status_code=400, detail=CoreErrors.INVALID_SUBSCRIPTION_DURATION)
+            subscription.points_balance = plan.points * multiplier
             await db.commit()
             await db.refresh(subscription)
             return subscription
-        return None
\ No newline at end of file
+        return None
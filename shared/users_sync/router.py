@@ -1,17 +1,52 @@
-import os
-import traceback
 import uuid
+from datetime import timezone
+from email.utils import format_datetime
 from typing import List
 
-from fastapi import APIRouter, HTTPException, Depends
+from fastapi import APIRouter, HTTPException, Depends, Request, Response
+from pydantic import TypeAdapter
 
 from shared.enums import MicroServiceName
 from shared.errors.core import CoreErrors
 from shared.errors.identity import IdentityErrors
 from shared.schemas.core.user import UserSubscriptionRead, UserSubscriptionUpdate
 from shared.users_sync import SessionDep, get_api_key
+from shared.users_sync.db import User, current_microservice_name
 from shared.users_sync.schema import UserRead, UserCreate, UserUpdate
-from shared.users_sync.service import get_users, get_user, update_user, delete_user, create_user_account
+from shared.users_sync.service import (get_users, get_users_by_account_ids, UserLoader, create_user_account,
+                                       create_users_bulk, update_user_by_account_id, delete_user_by_account_id)
+from shared.utils.logger import TsLogger
+
+logger = TsLogger(name=__name__)
+
+# Validates a whole page of users in one core-schema pass instead of one call per row
+_UserReadList = TypeAdapter(list[UserRead])
+
+
+def _etag(user: User) -> str:
+    # updated_at is bumped on every write, so it versions the row; microseconds keep
+    # two writes within the same second apart
+    return f'W/"{user.user_id}-{int(user.updated_at.timestamp() * 1_000_000)}"'
+
+
+def _validators(user: User) -> dict[str, str]:
+    """
+    Conditional-request headers for a single user.
+    """
+    return {
+        "ETag": _etag(user),
+        "Last-Modified": format_datetime(user.updated_at.astimezone(timezone.utc), usegmt=True),
+        "Cache-Control": "private, max-age=30",
+    }
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    # If-None-Match uses weak comparison, so the W/ prefix is ignored on both sides
+    if if_none_match.strip() == "*":
+        return True
+    opaque = etag.removeprefix("W/")
+    return any(tag.strip().removeprefix("W/") == opaque for tag in if_none_match.split(","))
+
 
 user_sync_router = APIRouter(
     prefix="/accounts",
@@ -23,44 +58,72 @@ user_sync_router = APIRouter(
 @user_sync_router.get("/", response_model=List[UserRead])
 async def read_users(db: SessionDep, skip: int = 0, limit: int = 10):
     try:
-        users = await get_users(db, skip, limit)
-        return [UserRead.model_validate(user) for user in users]
+        users = [user async for user in get_users(db, skip, limit)]
+        # the page is validated once here, so dump it directly instead of having
+        # FastAPI validate it a second time against response_model
+        page = _UserReadList.validate_python(users, from_attributes=True)
+        return Response(content=_UserReadList.dump_json(page), media_type="application/json")
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"An error occurred while fetching users: {str(e)}")
 
 
+@user_sync_router.post("/lookup", response_model=List[UserRead])
+async def read_users_by_account_ids(account_ids: List[uuid.UUID], db: SessionDep):
+    """
+    The users of many accounts in one query, in request order; unknown accounts are left out.
+    """
+    users = await get_users_by_account_ids(db, account_ids)
+    found = [users[account_id] for account_id in dict.fromkeys(account_ids) if account_id in users]
+    page = _UserReadList.validate_python(found, from_attributes=True)
+    return Response(content=_UserReadList.dump_json(page), media_type="application/json")
+
+
 @user_sync_router.post("/", response_model=UserRead)
 async def create_user(user: UserCreate, db: SessionDep) -> UserRead:
     new_user = await create_user_account(user, db)
     return UserRead.model_validate(new_user)
 
 
+@user_sync_router.post("/bulk", response_model=List[UserRead])
+async def create_users(users: List[UserCreate], db: SessionDep):
+    """
+    Create many users with a single INSERT ... RETURNING and one commit.
+    """
+    new_users = await create_users_bulk(users, db)
+    page = _UserReadList.validate_python(new_users, from_attributes=True)
+    return Response(content=_UserReadList.dump_json(page), media_type="application/json")
+
+
 @user_sync_router.get("/{user_id}", response_model=UserRead)
-async def read_user(user_id: uuid.UUID, db: SessionDep) -> UserRead:
-    user = await get_user(db, user_id)
+async def read_user(user_id: uuid.UUID, request: Request, response: Response) -> UserRead | Response:
+    # concurrent reads share one IN query; UserRead needs none of the user's relationships
+    user = await UserLoader().load(user_id)
     if user is None:
         raise HTTPException(status_code=404, detail=IdentityErrors.USER_NOT_FOUND)
+
+    headers = _validators(user)
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and _etag_matches(if_none_match, headers["ETag"]):
+        return Response(status_code=304, headers=headers)
+    response.headers.update(headers)
     return UserRead.model_validate(user)
 
 
 @user_sync_router.put("/{user_id}", response_model=UserRead)
 async def update_user_endpoint(user_id: uuid.UUID, update_data: UserUpdate, db: SessionDep) -> UserRead:
-    user = await get_user(db, user_id)
-    if user is None:
+    updated_user = await update_user_by_account_id(db, user_id, update_data)
+    if updated_user is None:
         raise HTTPException(status_code=404, detail=IdentityErrors.USER_NOT_FOUND)
-
-    updated_user = await update_user(user, update_data, db)
     return UserRead.model_validate(updated_user)
 
 @user_sync_router.delete("/{user_id}", response_model=None)
 async def delete_user_endpoint(user_id: uuid.UUID, db: SessionDep):
-    user = await get_user(db, user_id)
+    user = await delete_user_by_account_id(db, user_id)
     if user is None:
         raise HTTPException(status_code=404, detail=IdentityErrors.USER_NOT_FOUND)
-    await delete_user(user, db)
 
-if os.environ["CURRENT_MICRO_SERVICE_NAME"] == MicroServiceName.CORE_SERVICE:
-    from shared.users_sync.ms_specific.core_service import update_user_subscription
+if current_microservice_name == MicroServiceName.CORE_SERVICE:
+    from shared.users_sync.ms_specific.core_service import load_user_sub_plan, update_user_subscription
     @user_sync_router.put("/{user_id}/subscription", response_model=UserSubscriptionRead)
     async def change_user_subscription(
             user_id: uuid.UUID,
@@ -68,15 +131,16 @@ if os.environ["CURRENT_MICRO_SERVICE_NAME"] == MicroServiceName.CORE_SERVICE:
             db: SessionDep
     ) -> UserSubscriptionRead:
         try:
-            user = await get_user(db, user_id)
-            if user is None:
+            user_sub_plan = await load_user_sub_plan(db, user_id, subscription_update.plan_id)
+            if user_sub_plan is None:
                 raise HTTPException(status_code=404, detail=IdentityErrors.USER_NOT_FOUND)
+            _, subscription, plan = user_sub_plan
 
-            updated_subscription = await update_user_subscription(user, subscription_update, db)
+            updated_subscription = await update_user_subscription(subscription, plan, subscription_update, db)
             if updated_subscription is None:
                 raise HTTPException(status_code=404, detail=CoreErrors.NO_SUBSCRIPTION_FOUND)
             return UserSubscriptionRead.model_validate(updated_subscription)
         except HTTPException as e:
-            traceback.print_exc()
+            logger.error("subscription update failed", exception=e)
             raise HTTPException(status_code=404, detail=CoreErrors.NO_SUBSCRIPTION_FOUND)
 
@@ -1,26 +1,160 @@
-import os
 import uuid
 
+from cachetools import TTLCache
 from fastapi import HTTPException
+from sqlalchemy import bindparam, insert, inspect, update
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
-from typing import List
+from sqlalchemy.orm import make_transient_to_detached, raiseload, with_parent
+from sqlalchemy.orm.attributes import set_committed_value
+from typing import AsyncIterator, Iterable, List
 
-from shared.enums import MicroServiceName
+from shared import db_manager
+from shared.enums import MicroServiceName, UserRole
 from shared.errors.core import CoreErrors
-from shared.users_sync.db import User
+from shared.users_sync.db import User, current_microservice_name, roles_to_bits
 from shared.users_sync.schema import UserCreate, UserUpdate
+from shared.utils.micro_batcher import MicroBatcher
 
+# Hot-path statements are built once; calls only bind parameters, so SQLAlchemy's
+# compiled-statement cache is hit without re-constructing the Select each time.
+_STMT_USERS_PAGE = select(User).offset(bindparam('skip')).limit(bindparam('lim')).execution_options(yield_per=100)
+_STMT_USER_BY_ACCT = select(User).where(User.account_id == bindparam('acct'))
+_STMT_USER_BY_ACCT_MINIMAL = _STMT_USER_BY_ACCT.options(raiseload("*"))
+# exact match, served by the unique index on email
+_STMT_USER_BY_EMAIL = select(User).where(User.email == bindparam('email'))
+
+# Process-local cache of User column values keyed by account_id, plus an email -> account_id
+# index into it, so an email hit never outlives the row it points to.
+# Rows are cached rather than ORM instances since an instance belongs to one session.
+# Entries are dropped on local writes only, so the short TTL bounds how long other
+# workers can serve a row changed elsewhere.
+_user_cache: TTLCache = TTLCache(maxsize=10_000, ttl=5)
+_email_cache: TTLCache = TTLCache(maxsize=10_000, ttl=5)
+# relationship loading strategies a plain SELECT of User runs eagerly
+_EAGER_LOADS = frozenset({'selectin', 'joined', 'subquery', 'immediate'})
+
+
+def _cache_user(user: User) -> None:
+    row = {attr.key: getattr(user, attr.key) for attr in inspect(User).column_attrs}
+    _user_cache[user.account_id] = row
+    _email_cache[user.email] = user.account_id
+
+
+def invalidate_user_cache(user: User, old_email: str | None = None) -> None:
+    """
+    Drop `user` from both caches. The email entry is dropped under the current email,
+    the cached one and `old_email`, so a changed email never leaves a stale entry behind.
+    """
+    row = _user_cache.pop(user.account_id, None)
+    for email in {user.email, old_email, row and row['email']} - {None}:
+        _email_cache.pop(email, None)
+
+
+async def _user_from_cache(db: AsyncSession, row: dict, load_relationships: bool = True) -> User:
+    """
+    Attach a cached row to `db` as a persistent User without re-selecting its columns.
+    A User already in `db`'s identity map is returned as is, like a SELECT would, so the
+    cached row never overwrites state the session loaded or changed itself.
+    Unless `load_relationships` is False, the relationships a SELECT would eager-load are
+    then fetched by the user's key, one query each like selectin loading, so the instance
+    matches one from get_user's SELECT; lazy='select' relationships stay unloaded in both.
+    """
+    user = db.identity_map.get(inspect(User).identity_key_from_primary_key((row['user_id'],)))
+    if user is None:
+        user = User(**row)
+        make_transient_to_detached(user)
+        user = await db.merge(user, load=False)
+    if load_relationships:
+        unloaded = inspect(user).unloaded
+        for rel in inspect(User).relationships:
+            if rel.lazy not in _EAGER_LOADS or rel.key not in unloaded:
+                continue
+            result = await db.scalars(select(rel.mapper).where(with_parent(user, rel.class_attribute)))
+            related = result.all()
+            set_committed_value(user, rel.key, list(related) if rel.uselist else next(iter(related), None))
+    return user
+
+
+async def get_users(db: AsyncSession, skip: int, limit: int) -> AsyncIterator[User]:
+    """
+    Stream a page of users, fetched from the server cursor 100 rows at a time.
+    """
+    result = await db.stream_scalars(_STMT_USERS_PAGE, {'skip': skip, 'lim': limit})
+    async for user in result:
+        yield user
 
-async def get_users(db: AsyncSession, skip: int, limit: int) -> List[User]:
-    stmt = select(User).offset(skip).limit(limit)
-    result = await db.execute(stmt)
-    return list(result.scalars().all())
 
 async def get_user(db: AsyncSession, account_id: uuid.UUID) -> User | None:
-    stmt = select(User).where(User.account_id == account_id)
+    row = _user_cache.get(account_id)
+    if row is not None:
+        return await _user_from_cache(db, row)
+
+    result = await db.execute(_STMT_USER_BY_ACCT, {'acct': account_id})
+    user = result.scalar_one_or_none()
+    if user is not None:
+        _cache_user(user)
+    return user
+
+async def get_user_minimal(db: AsyncSession, account_id: uuid.UUID) -> User | None:
+    """
+    Like get_user, but never loads relationships (accessing one raises), so services whose
+    User declares selectin relationships issue a single SELECT. For write paths that only
+    touch the user's own columns.
+    """
+    row = _user_cache.get(account_id)
+    if row is not None:
+        return await _user_from_cache(db, row, load_relationships=False)
+
+    result = await db.execute(_STMT_USER_BY_ACCT_MINIMAL, {'acct': account_id})
+    user = result.scalar_one_or_none()
+    if user is not None:
+        _cache_user(user)
+    return user
+
+async def get_users_by_account_ids(db: AsyncSession, account_ids: Iterable[uuid.UUID]) -> dict[uuid.UUID, User]:
+    """
+    Load many users in one `account_id IN (...)` query, without relationships.
+    Accounts that do not exist are simply absent from the result.
+    """
+    account_ids = set(account_ids)
+    if not account_ids:
+        return {}
+    stmt = select(User).where(User.account_id.in_(account_ids)).options(raiseload("*"))
     result = await db.execute(stmt)
-    return result.scalar_one_or_none()
+    users = {user.account_id: user for user in result.scalars().all()}
+    for user in users.values():
+        _cache_user(user)
+    return users
+
+class UserLoader(MicroBatcher):
+    """
+    Dataloader for users: `await UserLoader().load(account_id)` calls made within the same
+    5 ms window are answered by a single IN query on a session of its own. The returned
+    users are detached, so they are for reading/serialization, not for modifying.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            cls._instance = super(UserLoader, cls).__new__(cls)
+            cls._instance._initialized = False
+        return cls._instance
+
+    def __init__(self, max_batch_size: int = 500, window: float = 0.005):
+        if self._initialized:
+            return
+        self._initialized = True
+
+        super().__init__(max_batch_size=max_batch_size, window=window)
+
+    async def load(self, account_id: uuid.UUID) -> User | None:
+        return await self.submit(account_id)
+
+    async def _process_batch(self, items: List[uuid.UUID]) -> List[User | None]:
+        async with db_manager.AsyncSessionLocal() as db:
+            users = await get_users_by_account_ids(db, items)
+        return [users.get(account_id) for account_id in items]
 
 async def get_user_by_account_id(db: AsyncSession, account_id: uuid.UUID) -> User | None:
     user = await get_user(db=db, account_id=account_id)
@@ -29,9 +163,16 @@ async def get_user_by_account_id(db: AsyncSession, account_id: uuid.UUID) -> Use
     return user
 
 async def get_user_by_email(db: AsyncSession, email: str) -> User | None:
-    stmt = select(User).where(User.email == email)
-    result = await db.execute(stmt)
-    return result.scalar_one_or_none()
+    account_id = _email_cache.get(email)
+    row = _user_cache.get(account_id) if account_id is not None else None
+    if row is not None and row['email'] == email:
+        return await _user_from_cache(db, row)
+
+    result = await db.execute(_STMT_USER_BY_EMAIL, {'email': email})
+    user = result.scalar_one_or_none()
+    if user is not None:
+        _cache_user(user)
+    return user
 
 async def create_user_account(user_data: UserCreate, db: AsyncSession) -> User:
     new_user = User(
@@ -50,24 +191,105 @@ async def create_user_account(user_data: UserCreate, db: AsyncSession) -> User:
     )
     db.add(new_user)
     await db.commit()
-    await db.refresh(new_user)
-    if os.environ['CURRENT_MICRO_SERVICE_NAME'] == MicroServiceName.CORE_SERVICE:
-        from shared.users_sync.ms_specific.core_service import create_user_subscription
-        await create_user_subscription(new_user, db)
-    elif os.environ['CURRENT_MICRO_SERVICE_NAME'] == MicroServiceName.SUBSCRIPTION_SERVICE:
-        from subscription_service.services.subscriptions import create_user_for_subscription_ms
-        await create_user_for_subscription_ms(new_user, db)
+    invalidate_user_cache(new_user)
+    await _after_user_created(new_user, db)
     return new_user
 
+async def create_users_bulk(users_data: List[UserCreate], db: AsyncSession) -> List[User]:
+    """
+    Insert many users with one INSERT ... RETURNING and a single commit.
+    Roles go in as plain enum values, which the Enum type accepts as-is.
+    """
+    if not users_data:
+        return []
+    payload = [
+        {
+            **user_data.model_dump(),
+            "email": str(user_data.email),
+            "roles": [role.value if isinstance(role, UserRole) else role for role in user_data.roles],
+            # ORM validators do not run for bulk inserts
+            "roles_bits": roles_to_bits(user_data.roles),
+        }
+        for user_data in users_data
+    ]
+    result = await db.scalars(insert(User).returning(User), payload)
+    new_users = list(result.all())
+    await db.commit()
+    for new_user in new_users:
+        invalidate_user_cache(new_user)
+        await _after_user_created(new_user, db)
+    return new_users
+
+async def _create_core_user(new_user: User, db: AsyncSession) -> None:
+    from shared.users_sync.ms_specific.core_service import create_user_subscription
+    await create_user_subscription(new_user, db)
+
+
+async def _create_subscription_user(new_user: User, db: AsyncSession) -> None:
+    from subscription_service.services.subscriptions import create_user_for_subscription_ms
+    await create_user_for_subscription_ms(new_user, db)
+
+
+# Service-specific setup for a freshly synced user; services without an entry need none.
+_AFTER_USER_CREATED = {
+    MicroServiceName.CORE_SERVICE: _create_core_user,
+    MicroServiceName.SUBSCRIPTION_SERVICE: _create_subscription_user,
+}
+
+
+async def _after_user_created(new_user: User, db: AsyncSession) -> None:
+    """
+    Service-specific setup for a freshly synced user.
+    """
+    hook = _AFTER_USER_CREATED.get(current_microservice_name)
+    if hook is not None:
+        await hook(new_user, db)
+
+
 async def update_user(user: User, update_data: UserUpdate, db: AsyncSession) -> User:
+    old_email = user.email
     update_data = update_data.model_dump(exclude_unset=True)
     for key, value in update_data.items():
         setattr(user, key, value)
     await db.commit()
-    await db.refresh(user)
+    invalidate_user_cache(user, old_email=old_email)
     return user
 
 async def delete_user(user: User, db: AsyncSession):
     user.is_deleted = True
     await db.commit()
-    await db.refresh(user)
+    invalidate_user_cache(user)
+
+async def update_user_by_account_id(db: AsyncSession, account_id: uuid.UUID, update_data: UserUpdate) -> User | None:
+    """
+    Apply `update_data` with a single UPDATE ... RETURNING; None if the account does not exist.
+    """
+    values = update_data.model_dump(exclude_unset=True)
+    if not values:
+        return await get_user_minimal(db, account_id)
+    if 'roles' in values:
+        values['roles_bits'] = roles_to_bits(values['roles'])
+    stmt = update(User).where(User.account_id == account_id).values(**values).returning(User)
+    result = await db.execute(stmt)
+    user = result.scalar_one_or_none()
+    await db.commit()
+    if user is not None:
+        invalidate_user_cache(user)
+    return user
+
+async def delete_user_by_account_id(db: AsyncSession, account_id: uuid.UUID) -> User | None:
+    """
+    Soft-delete with a single UPDATE ... RETURNING; None if the account does not exist.
+    """
+    stmt = (
+        update(User)
+        .where(User.account_id == account_id)
+        .values(is_deleted=True)
+        .returning(User)
+    )
+    result = await db.execute(stmt)
+    user = result.scalar_one_or_none()
+    await db.commit()
+    if user is not None:
+        invalidate_user_cache(user)
+    return user
@@ -1,4 +1,5 @@
 import base64
+import functools
 import hashlib
 
 from cryptography.fernet import Fernet
@@ -6,12 +7,18 @@ from cryptography.fernet import Fernet
 from shared.config import shared_settings
 
 
+@functools.lru_cache(maxsize=1)
+def _cipher() -> Fernet:
+    # Hash the encryption key to ensure it is exactly 32 bytes long
+    hashed_key = hashlib.sha256(shared_settings.ENCRYPTION_KEY.encode()).digest()
+    key = base64.urlsafe_b64encode(hashed_key)
+    return Fernet(key)
+
+
 class EncryptionUtility:
     def __init__(self):
-        # Hash the encryption key to ensure it is exactly 32 bytes long
-        hashed_key = hashlib.sha256(shared_settings.ENCRYPTION_KEY.encode()).digest()
-        key = base64.urlsafe_b64encode(hashed_key)
-        self.fernet = Fernet(key)
+        # the key derivation and Fernet setup happen once per process
+        self.fernet = _cipher()
 
     def encrypt(self, data: str) -> str:
         """
@@ -1,17 +1,25 @@
-import threading
+from contextvars import ContextVar, Token
+from typing import Optional
 
 from starlette.requests import Request
 
-storage = threading.local()
+# Context variables rather than thread-locals: every asyncio task (i.e. every request)
+# sees its own values even though they all run on the same event-loop thread.
+_request: ContextVar[Optional[Request]] = ContextVar('request', default=None)
+_source_id: ContextVar[Optional[str]] = ContextVar('source_id', default=None)
 
 
-def set_request(request):
-    storage.request = request
+def set_request(request) -> Token:
+    return _request.set(request)
+
+
+def reset_request(token: Token) -> None:
+    _request.reset(token)
 
 
 def get_request() -> Request:
-    return getattr(storage, 'request', None)
+    return _request.get()
 
 
 def get_source_id() -> str:
-    return getattr(storage, 'source_id', None)
+    return _source_id.get()
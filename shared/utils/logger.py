@@ -70,12 +70,17 @@ class TsLogger:
         """Log a debug-level message."""
         self.log(logging.DEBUG, message)
 
-    def error(self, message: str, exception: Exception = None):
-        """Log an error-level message with optional exception traceback."""
-        self.log(logging.ERROR, message)
-        if exception:
-            self.logger.error(message, exc_info=True)  # Log the exception traceback
-            self.console.print(f"\n[red]Exception:[/red] {exception}")
+    def error(self, message: str, exception: Exception = None, exc_info: bool = False):
+        """
+        Log an error-level message. For expected exceptions the traceback is only rendered
+        at DEBUG level; pass `exc_info=True` for unexpected ones to always render it.
+        """
+        if exception is None:
+            self.log(logging.ERROR, message)
+        elif exc_info or self.logger.isEnabledFor(logging.DEBUG):
+            self.logger.error(message, exc_info=exception, extra={"request_id": self.request_id.get()})
+        else:
+            self.log(logging.ERROR, f"{message}: {exception!r}")
 
     def print(self, obj):
         """Pretty print an object to the console."""
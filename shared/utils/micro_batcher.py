@@ -0,0 +1,107 @@
+import asyncio
+from typing import Any, List, Optional
+
+from shared.utils.logger import TsLogger
+
+logger = TsLogger(name=__name__)
+
+
+class MicroBatcher:
+    """
+    Coalesces concurrent single-item requests into batched calls.
+
+    Callers `await self.submit(item)`; a background task drains the queue until it has
+    `max_batch_size` items or `window` seconds have passed since the first one, whichever
+    comes first, then hands the batch to `_process_batch` and resolves every caller's
+    future from the result. Batches run concurrently; the next one is not held up while
+    the previous is in flight.
+
+    Subclasses implement `_process_batch(items) -> results` (same order and length as
+    `items`); a result that is an Exception instance is raised to that caller only.
+
+    The queue and worker belong to the event loop that created them; when `submit` is
+    called from a different loop (e.g. a new `asyncio.run`), both are recreated on it.
+    """
+
+    def __init__(self, max_batch_size: int, window: float):
+        self.max_batch_size = max_batch_size
+        self.window = window
+        self._queue: Optional[asyncio.Queue] = None
+        self._worker: Optional[asyncio.Task] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._in_flight: set[asyncio.Task] = set()
+
+    async def _process_batch(self, items: List[Any]) -> List[Any]:
+        raise NotImplementedError
+
+    def _ensure_worker(self) -> None:
+        loop = asyncio.get_running_loop()
+        if self._loop is not loop or self._worker is None or self._worker.done():
+            if self._loop is not loop:
+                # tasks of a previous loop can never finish on this one
+                self._in_flight = set()
+            self._loop = loop
+            self._queue = asyncio.Queue()
+            self._worker = loop.create_task(self._run())
+
+    async def close(self) -> None:
+        """
+        Stop the worker. Callers still waiting in the queue are cancelled; batches
+        already in flight run to completion.
+        """
+        worker, queue = self._worker, self._queue
+        self._worker = self._queue = self._loop = None
+        if worker is None or worker.done():
+            return
+        worker.cancel()
+        if worker.get_loop() is asyncio.get_running_loop():
+            await asyncio.gather(worker, return_exceptions=True)
+        while not queue.empty():
+            _, future = queue.get_nowait()
+            future.cancel()
+
+    async def submit(self, item: Any) -> Any:
+        self._ensure_worker()
+        future = asyncio.get_running_loop().create_future()
+        await self._queue.put((item, future))
+        return await future
+
+    async def _run(self) -> None:
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self._queue.get()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+
+            task = asyncio.create_task(self._resolve_batch(batch))
+            self._in_flight.add(task)
+            task.add_done_callback(self._in_flight.discard)
+
+    async def _resolve_batch(self, batch: list) -> None:
+        items = [item for item, _ in batch]
+        try:
+            results = await self._process_batch(items)
+            if len(results) != len(items):
+                # results are matched to callers by position, so a short or long list pairs none reliably
+                raise RuntimeError(f"expected {len(items)} results, got {len(results)}")
+        except Exception as e:
+            logger.error(f"{type(self).__name__}: batch of {len(items)} failed: {str(e)}")
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            if future.done():
+                continue
+            if isinstance(result, Exception):
+                future.set_exception(result)
+            else:
+                future.set_result(result)
@@ -1,8 +1,7 @@
 from typing import List
 
-import tiktoken
-
 from shared.enums import OpenAIModelSlugEnum
+from shared.ts_tokenizer import _get_encoding
 from core_service.DB.models.mongo.error_log import ErrorLog
 from core_service.DB.models.platform_management import OpenAIModel
 from core_service.schemas.api_request import TokenStats
@@ -33,7 +32,7 @@ class TsTokenizer:
             raise ValueError(f"Failed to load OpenAI model: {model}")
         encoding = self.model.name  # Use provided model
         try:
-            self.encoding = tiktoken.encoding_for_model(encoding)
+            self.encoding = _get_encoding(encoding)
         except KeyError as e:
             ErrorLog(
                 exception=e,
@@ -44,7 +43,7 @@ class TsTokenizer:
 
     def num_of_tokens(self, text: str) -> int | None:
         if self.encoding:
-            return len(self.encoding.encode(text))
+            return len(self.encoding.encode_ordinary(text))
         else:
             return None
 
@@ -59,14 +58,10 @@ class TsTokenizer:
         if self.encoding is None:
             return stats
 
-        # Token counts
-        stats.prompt_tokens = len(self.encoding.encode(prompt))
-        context_text = ''
-        for message in context_messages:
-            context_text += str(message)
-        stats.context_tokens = len(self.encoding.encode(context_text))
-        stats.input_tokens = len(self.encoding.encode(user_message))
-        stats.response_tokens = len(self.encoding.encode(ai_response))
+        # Token counts; ordinary encoding skips the special-token scan
+        texts = [prompt, "".join(map(str, context_messages or [])), user_message, ai_response]
+        counts = [len(self.encoding.encode_ordinary(text)) for text in texts]
+        stats.prompt_tokens, stats.context_tokens, stats.input_tokens, stats.response_tokens = counts
 
         # Calculating costs
         # Token counts